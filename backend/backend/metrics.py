@@ -0,0 +1,117 @@
+import os
+import time
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+REQUESTS = Counter(
+    'foodgram_http_requests_total',
+    'Количество HTTP-запросов',
+    ['view', 'method', 'status']
+)
+LATENCY = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'Время обработки HTTP-запроса',
+    ['view']
+)
+DB_QUERIES = Counter(
+    'foodgram_db_queries_total',
+    'Количество SQL-запросов',
+    ['view']
+)
+DB_TIME = Counter(
+    'foodgram_db_query_duration_seconds_total',
+    'Суммарное время SQL-запросов',
+    ['view']
+)
+
+
+class QueryTracker:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def track_queries(tracker):
+    connection.execute_wrappers.append(tracker)
+
+
+def untrack_queries(tracker):
+    connection.execute_wrappers.remove(tracker)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        tracker = QueryTracker()
+        started = time.perf_counter()
+        with connection.execute_wrapper(tracker):
+            response = self.get_response(request)
+        self.observe(request, response, tracker, started)
+        return response
+
+    async def __acall__(self, request):
+        tracker = QueryTracker()
+        started = time.perf_counter()
+        await sync_to_async(track_queries)(tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(untrack_queries)(tracker)
+        self.observe(request, response, tracker, started)
+        return response
+
+    def observe(self, request, response, tracker, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unresolved'
+        if view == 'metrics':
+            return
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        LATENCY.labels(view).observe(duration)
+        DB_QUERIES.labels(view).inc(tracker.count)
+        DB_TIME.labels(view).inc(tracker.duration)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token or (
+        request.headers.get('Authorization') != f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics', metrics, name='metrics'),
     path('api/', include('recipes.urls')),
     path('api/', include('users.urls'))
 ]
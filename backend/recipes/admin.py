@@ -5,11 +5,11 @@ from .models import Favorite, Follow, Ingredient, PurchaseList, Recipe, Tag
 
 class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('author', 'name', 'tags')
-    list_display = ('name', 'followers')
+    list_display = ('name', 'followers', 'in_carts_count')
 
-    @admin.display(empty_value=None)
+    @admin.display(empty_value=None, ordering='favorites_count')
     def followers(self, obj):
-        return obj.favorite_recipe.all().count()
+        return obj.favorites_count
 
 
 class IngredientAdmin(admin.ModelAdmin):
@@ -0,0 +1,143 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import CustomUser, Favorite, Follow, PurchaseList, Recipe
+from .serializers import AddFavouriteRecipeSerializer, UserSerializer
+from .toggles import add_entry, remove_entry
+
+
+def json_response(data, status_code):
+    return JsonResponse(
+        data, status=status_code, safe=False,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+async def aget_object_or_404(model, **kwargs):
+    try:
+        return await model.objects.aget(**kwargs)
+    except model.DoesNotExist:
+        raise Http404
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAuthenticatedView(View):
+    http_method_names = ['get', 'delete', 'options']
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    def check_request(self, request):
+        request = Request(
+            request,
+            authenticators=[auth() for auth in self.authentication_classes]
+        )
+        for permission in self.permission_classes:
+            if not permission().has_permission(request, self):
+                if request.successful_authenticator is None:
+                    raise exceptions.NotAuthenticated
+                raise exceptions.PermissionDenied
+        for throttle in self.throttle_classes:
+            throttle = throttle()
+            if not throttle.allow_request(request, self):
+                raise exceptions.Throttled(throttle.wait())
+        return request.user
+
+    def get_authenticate_header(self):
+        if self.authentication_classes:
+            return self.authentication_classes[0]().authenticate_header(None)
+        return None
+
+    def handle_exception(self, error):
+        response = json_response({'detail': error.detail}, error.status_code)
+        if isinstance(error, (exceptions.NotAuthenticated,
+                              exceptions.AuthenticationFailed)):
+            header = self.get_authenticate_header()
+            if header:
+                response['WWW-Authenticate'] = header
+        if getattr(error, 'wait', None):
+            response['Retry-After'] = str(int(error.wait))
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await sync_to_async(self.check_request)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as error:
+            return self.handle_exception(error)
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+
+
+class RecipeListView(AsyncAuthenticatedView):
+    model = None
+    exists_message = None
+
+    async def get(self, request, recipe_id):
+        recipe = await aget_object_or_404(Recipe, id=recipe_id)
+        added = await sync_to_async(add_entry)(
+            self.model, user=request.user, recipe=recipe
+        )
+        if not added:
+            return json_response(
+                self.exists_message, status.HTTP_400_BAD_REQUEST
+            )
+        serializer = AddFavouriteRecipeSerializer(recipe)
+        return json_response(serializer.data, status.HTTP_201_CREATED)
+
+    async def delete(self, request, recipe_id):
+        removed = await sync_to_async(remove_entry)(
+            self.model, request.user, 'recipe', recipe_id
+        )
+        if not removed:
+            raise Http404
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+class FavouriteViewSet(RecipeListView):
+    model = Favorite
+    exists_message = 'Вы уже добавили рецепт в избранное'
+
+
+class PurchaseListViewSet(RecipeListView):
+    model = PurchaseList
+    exists_message = 'Вы уже добавили рецепт в список покупок'
+
+
+class FollowViewSet(AsyncAuthenticatedView):
+
+    async def get(self, request, user_id):
+        if request.user.id == user_id:
+            return json_response(
+                'Нельзя подписаться на самого себя',
+                status.HTTP_400_BAD_REQUEST
+            )
+        author = await aget_object_or_404(CustomUser, id=user_id)
+        added = await sync_to_async(add_entry)(
+            Follow, user=request.user, author=author
+        )
+        if not added:
+            return json_response(
+                'Вы уже подписаны', status.HTTP_400_BAD_REQUEST
+            )
+        data = await sync_to_async(lambda: UserSerializer(author).data)()
+        return json_response(data, status.HTTP_201_CREATED)
+
+    async def delete(self, request, user_id):
+        removed = await sync_to_async(remove_entry)(
+            Follow, request.user, 'author', user_id
+        )
+        if removed:
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        if not await CustomUser.objects.filter(id=user_id).aexists():
+            raise Http404
+        return json_response(
+            'Подписки не было', status.HTTP_400_BAD_REQUEST
+        )
@@ -0,0 +1,53 @@
+from django.apps import apps as global_apps
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+COUNTERS = (
+    ('recipes.Favorite', 'recipe', 'recipes.Recipe', 'favorites_count'),
+    ('recipes.PurchaseList', 'recipe', 'recipes.Recipe', 'in_carts_count'),
+    ('recipes.Recipe', 'author', 'users.CustomUser', 'recipes_count'),
+    ('recipes.Follow', 'author', 'users.CustomUser', 'followers_count'),
+)
+
+
+def change_counters(sender, instances, delta):
+    for source, field, target, counter in COUNTERS:
+        if source != sender._meta.label:
+            continue
+        value = F(counter) + delta
+        if delta < 0:
+            value = Greatest(value, Value(0))
+        pks = {getattr(instance, f'{field}_id') for instance in instances}
+        if not pks:
+            continue
+        global_apps.get_model(target).objects.filter(
+            pk__in=pks
+        ).update(**{counter: value})
+
+
+def get_total(source, field):
+    total = (
+        source.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(total), Value(0))
+
+
+def recount_counters(sender, pks):
+    for source, field, target, counter in COUNTERS:
+        if source != sender._meta.label:
+            continue
+        global_apps.get_model(target).objects.filter(
+            pk__in=pks
+        ).update(**{counter: get_total(sender, field)})
+
+
+def recount(apps=global_apps):
+    for source, field, target, counter in COUNTERS:
+        apps.get_model(target).objects.update(
+            **{counter: get_total(apps.get_model(source), field)}
+        )
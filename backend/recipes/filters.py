@@ -1,29 +1,80 @@
-import django_filters as filters
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django_filters import rest_framework as filters
 
-from .models import Recipe
+from .models import Favorite, PurchaseList, Recipe, Tag
+from .search import search_recipes
+from .signals import TAG_CHOICES_CACHE_KEY
+
+ORDERING_TRENDING = 'trending'
+
+
+def get_tag_choices():
+    return cache.get_or_set(
+        TAG_CHOICES_CACHE_KEY,
+        lambda: [
+            (slug, name)
+            for slug, name in Tag.objects.values_list('slug', 'name')
+        ],
+        settings.LIST_CACHE_TIMEOUT
+    )
 
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug'
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='get_tags'
     )
+    author = filters.NumberFilter(field_name='author_id')
     is_favorited = filters.BooleanFilter(method='get_favorite')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=((ORDERING_TRENDING, 'Популярные'),),
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags')
+        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags',
+                  'search', 'ordering')
 
-    def get_favorite(self, queryset, name, value):
+    def get_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'), tag__slug__in=value
+                )
+            )
+        )
+
+    def filter_by_user_list(self, queryset, model, value):
+        if not value:
+            return queryset
         user = self.request.user
-        if value:
-            return Recipe.objects.filter(favorite_recipe__user=user)
-        return Recipe.objects.all()
+        if user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(
+            Exists(model.objects.filter(user=user, recipe=OuterRef('pk')))
+        )
+
+    def get_favorite(self, queryset, name, value):
+        return self.filter_by_user_list(queryset, Favorite, value)
 
     def get_is_in_shopping_cart(self, queryset, name, value):
-        user = self.request.user
-        if value:
-            return Recipe.objects.filter(customers__user=user)
-        return Recipe.objects.all()
+        return self.filter_by_user_list(queryset, PurchaseList, value)
+
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        if value != ORDERING_TRENDING:
+            return queryset
+        return queryset.filter(trending__isnull=False).order_by(
+            '-trending__score', '-pub_date', '-id'
+        )
@@ -0,0 +1,125 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import Recipe
+from .response_cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_PIXELS = 40_000_000
+MAX_SIZE = (1920, 1920)
+THUMBNAIL_SIZE = (480, 480)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+WORKERS = 2
+
+VARIANTS = ('full', 'full_webp', 'thumbnail', 'thumbnail_webp')
+
+executor = ThreadPoolExecutor(
+    max_workers=WORKERS, thread_name_prefix='recipe-images'
+)
+
+
+def is_processed(recipe):
+    return bool(recipe.image) and (
+        recipe.image_variants.get('full') == recipe.image.name
+    )
+
+
+def schedule_processing(recipe):
+    if not recipe.image or is_processed(recipe):
+        return
+    recipe_id, name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: executor.submit(process_recipe_image, recipe_id, name)
+    )
+
+
+def encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif image_format == 'JPEG':
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=JPEG_QUALITY,
+            optimize=True, progressive=True
+        )
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(name):
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        if image.width * image.height > MAX_UPLOAD_PIXELS:
+            raise ValueError(f'{name}: изображение слишком большое')
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'P')
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image_format, extension = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+    full = image.copy()
+    full.thumbnail(MAX_SIZE)
+    thumbnail = image.copy()
+    thumbnail.thumbnail(THUMBNAIL_SIZE)
+    base = os.path.splitext(name)[0]
+    sources = {
+        'full': (full, image_format, extension),
+        'full_webp': (full, 'WEBP', 'webp'),
+        'thumbnail': (thumbnail, image_format, extension),
+        'thumbnail_webp': (thumbnail, 'WEBP', 'webp'),
+    }
+    return {
+        variant: default_storage.save(
+            f'{base}_{variant}.{variant_extension}',
+            encode(variant_image, variant_format)
+        )
+        for variant, (variant_image, variant_format, variant_extension)
+        in sources.items()
+    }
+
+
+def delete_files(names):
+    for name in names:
+        if name:
+            default_storage.delete(name)
+
+
+def process_recipe_image(recipe_id, name):
+    close_old_connections()
+    try:
+        old_variants = Recipe.objects.filter(
+            pk=recipe_id, image=name
+        ).values_list('image_variants', flat=True).first()
+        if old_variants is None:
+            return
+        variants = build_variants(name)
+        updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+            image=variants['full'], image_variants=variants
+        )
+        if updated:
+            bump_version()
+            delete_files([name, *old_variants.values()])
+        else:
+            delete_files(variants.values())
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        close_old_connections()
+
+
+def variant_names(recipe):
+    if not recipe.image:
+        return {}
+    names = {variant: recipe.image.name for variant in VARIANTS}
+    if is_processed(recipe):
+        names.update(recipe.image_variants)
+    return names
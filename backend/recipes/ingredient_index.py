@@ -0,0 +1,94 @@
+import bisect
+import re
+import threading
+
+from django.core.cache import cache
+
+from . import versions
+from .models import Ingredient
+
+AUTOCOMPLETE_LIMIT = 20
+INDEX_VERSION_CACHE_KEY = 'recipes:ingredient-index:version'
+INDEX_CACHE_KEY = 'recipes:ingredient-index'
+INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+WORD_START = re.compile(r'\b\w')
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е').strip()
+
+
+def prefix_range(keys, prefix):
+    start = bisect.bisect_left(keys, prefix)
+    end = bisect.bisect_left(keys, prefix + '\U0010ffff', lo=start)
+    return start, end
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+
+    def invalidate(self):
+        versions.bump_version(INDEX_VERSION_CACHE_KEY)
+
+    def _build(self):
+        rows = sorted(
+            (normalize(name), {
+                'id': pk,
+                'name': name,
+                'measurement_unit': measurement_unit,
+            })
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        keys = [key for key, _ in rows]
+        entries = [entry for _, entry in rows]
+        words = sorted(
+            (key[match.start():], position)
+            for position, key in enumerate(keys)
+            for match in list(WORD_START.finditer(key))[1:]
+        )
+        return (
+            keys,
+            entries,
+            [word for word, _ in words],
+            [position for _, position in words],
+        )
+
+    def _get(self):
+        version = versions.get_version(INDEX_VERSION_CACHE_KEY)
+        with self._lock:
+            if self._version != version:
+                key = f'{INDEX_CACHE_KEY}:{version}'
+                index = cache.get(key)
+                if index is None:
+                    index = self._build()
+                    cache.set(key, index, INDEX_CACHE_TIMEOUT)
+                self._index = index
+                self._version = version
+            return self._index
+
+    def search(self, query, limit=AUTOCOMPLETE_LIMIT):
+        query = normalize(query)
+        keys, entries, words, positions = self._get()
+        if not query:
+            return entries[:limit]
+        start, end = prefix_range(keys, query)
+        result = entries[start:min(end, start + limit)]
+        word_start, word_end = prefix_range(words, query)
+        added = set()
+        for position in positions[word_start:word_end]:
+            if len(result) == limit:
+                break
+            if start <= position < end or position in added:
+                continue
+            added.add(position)
+            result.append(entries[position])
+        return result
+
+
+ingredient_index = IngredientIndex()
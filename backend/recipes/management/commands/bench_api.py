@@ -0,0 +1,100 @@
+import json
+import math
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+from users.models import CustomUser
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку и число SQL-запросов основных эндпоинтов '
+            'и выводит результат в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--output', help='Файл для сохранения JSON')
+
+    def handle(self, *args, **options):
+        user = (
+            CustomUser.objects
+            .annotate(carts=Count('purchases'), follows=Count('followers'))
+            .filter(carts__gt=0, follows__gt=0)
+            .order_by('-carts')
+            .first()
+        )
+        recipe = Recipe.objects.first()
+        ingredient = Ingredient.objects.first()
+        if user is None or recipe is None or ingredient is None:
+            raise CommandError(
+                'Нет данных: сначала выполните manage.py seed_benchmark'
+            )
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        endpoints = {
+            'recipes-list': reverse('recipes-list'),
+            'recipes-list-cursor': f'{reverse("recipes-list")}?cursor=',
+            'recipes-detail': reverse('recipes-detail', args=[recipe.id]),
+            'users_subs': f'{reverse("users_subs")}?recipes_limit=3',
+            'ingredients-search': (
+                f'{reverse("ingredients-list")}?name={ingredient.name[:3]}'
+            ),
+            'dowload_shopping_cart': reverse('dowload_shopping_cart'),
+        }
+        results = {}
+        for name, url in endpoints.items():
+            results[name] = self.measure(client, url, options)
+        report = {
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'recipes': Recipe.objects.count(),
+            'users': CustomUser.objects.count(),
+            'endpoints': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            self.fetch(client, url)
+        timings = []
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            response = self.fetch(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        with CaptureQueriesContext(connection) as context:
+            self.fetch(client, url)
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'queries': len(context),
+        }
+
+    def fetch(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import TOP_K, compute_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие рецепты по ингредиентам и тегам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=TOP_K,
+            help='Сколько похожих рецептов сохранять для каждого рецепта'
+        )
+
+    def handle(self, *args, **options):
+        created = compute_similar_recipes(top=options['top'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено {created} пар похожих рецептов'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает популярность рецептов по добавлениям '
+            'в избранное и списки покупок')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать с нуля, игнорируя сохранённую отметку'
+        )
+
+    def handle(self, *args, **options):
+        updated = compute_trending(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярность обновлена для {updated} рецептов'
+        ))
@@ -0,0 +1,122 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.ingredient_index import ingredient_index
+from recipes.mixins import invalidate_cached_list
+from recipes.models import Ingredient
+from recipes.signals import INGREDIENTS_CACHE_KEY
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'data', 'ingredients.csv'
+)
+BATCH_SIZE = 1000
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    while True:
+        chunk = file.read(JSON_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in '[], \t\r\n':
+                position += 1
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            position = end
+            yield item['title'], item['dimension']
+        if not chunk:
+            if buffer[position:].strip():
+                raise CommandError('Некорректный JSON')
+            return
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = 'Загружает справочник ингредиентов из csv или json файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Посчитать изменения без записи в базу'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json')
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            rows = reader(file)
+            while True:
+                batch = dict(
+                    (name.strip(), unit.strip())
+                    for name, unit in islice(rows, options['batch_size'])
+                )
+                if not batch:
+                    break
+                self.load_batch(batch, counts, options['dry_run'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        if not options['dry_run']:
+            ingredient_index.invalidate()
+            invalidate_cached_list(INGREDIENTS_CACHE_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            'Добавлено: {inserted}, обновлено: {updated}, '
+            'без изменений: {skipped}'.format(**counts)
+        ))
+
+    def load_batch(self, batch, counts, dry_run):
+        existing = dict(
+            Ingredient.objects.filter(name__in=batch).values_list(
+                'name', 'measurement_unit'
+            )
+        )
+        changed = []
+        for name, unit in batch.items():
+            if name not in existing:
+                counts['inserted'] += 1
+            elif existing[name] != unit:
+                counts['updated'] += 1
+            else:
+                counts['skipped'] += 1
+                continue
+            changed.append(Ingredient(name=name, measurement_unit=unit))
+        if dry_run or not changed:
+            return
+        Ingredient.objects.bulk_create(
+            changed,
+            batch_size=len(changed),
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['measurement_unit'],
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import is_processed, process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные и WebP варианты картинок рецептов'
+
+    def handle(self, *args, **options):
+        processed = 0
+        recipes = Recipe.objects.only('image', 'image_variants')
+        for recipe in recipes.iterator():
+            if recipe.image and not is_processed(recipe):
+                process_recipe_image(recipe.pk, recipe.image.name)
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {processed}'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ShoppingListItem
+from recipes.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает списки покупок пользователей из их корзин'
+
+    def handle(self, *args, **options):
+        rebuild_shopping_lists()
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок пересобраны: '
+            f'{ShoppingListItem.objects.count()} позиций'
+        ))
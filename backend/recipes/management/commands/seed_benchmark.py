@@ -0,0 +1,159 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.counters import recount
+from recipes.models import (Favorite, Follow, Ingredient, IngredientInRecipe,
+                            PurchaseList, Recipe, Tag)
+from recipes.search import update_search_vector
+from recipes.shopping_list import rebuild_shopping_lists
+from users.models import CustomUser
+
+BATCH_SIZE = 2000
+PASSWORD = 'benchmark-password'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетические данные для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Максимум подписок на пользователя')
+        parser.add_argument('--favorites', type=int, default=30,
+                            help='Максимум избранного на пользователя')
+        parser.add_argument('--carts', type=int, default=10,
+                            help='Максимум рецептов в корзине пользователя')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        with transaction.atomic():
+            tags = self.create_tags()
+            users = self.create_users(options['users'])
+            recipes = self.create_recipes(users, tags, options['recipes'])
+            self.create_links(
+                Follow, 'author', users, users, options['follows']
+            )
+            self.create_links(
+                Favorite, 'recipe', users, recipes, options['favorites']
+            )
+            self.create_links(
+                PurchaseList, 'recipe', users, recipes, options['carts']
+            )
+            recount()
+            rebuild_shopping_lists()
+            update_search_vector(Recipe.objects.all())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, рецептов: {len(recipes)}. '
+            f'Пароль пользователей: {PASSWORD}'
+        ))
+
+    def create_tags(self):
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        return list(Tag.objects.all())
+
+    def create_users(self, count):
+        start = CustomUser.objects.count()
+        password = make_password(PASSWORD)
+        return CustomUser.objects.bulk_create(
+            (
+                CustomUser(
+                    username=f'bench{index}',
+                    email=f'bench{index}@foodgram.ru',
+                    first_name='Бенчмарк',
+                    last_name=f'Пользователь {index}',
+                    password=password,
+                )
+                for index in range(start, start + count)
+            ),
+            batch_size=BATCH_SIZE
+        )
+
+    def create_recipes(self, users, tags, count):
+        authors = self.random.choices(
+            users, weights=zipf_weights(len(users)), k=count
+        )
+        recipes = Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=author,
+                    name=f'Рецепт {index}',
+                    image='recipes/benchmark.png',
+                    text='Синтетический рецепт для нагрузочного теста. ' * 5,
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for index, author in enumerate(authors)
+            ),
+            batch_size=BATCH_SIZE
+        )
+        now = timezone.now()
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                minutes=self.random.randint(0, 60 * 24 * 365)
+            )
+        Recipe.objects.bulk_update(
+            recipes, ['pub_date'], batch_size=BATCH_SIZE
+        )
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        ingredient_weights = zipf_weights(len(ingredient_ids), 0.8)
+        IngredientInRecipe.objects.bulk_create(
+            (
+                IngredientInRecipe(
+                    recipe=recipe, ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500)
+                )
+                for recipe in recipes
+                for ingredient_id in set(self.random.choices(
+                    ingredient_ids, weights=ingredient_weights,
+                    k=self.random.randint(3, 15)
+                ))
+            ),
+            batch_size=BATCH_SIZE
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe=recipe, tag=tag)
+                for recipe in recipes
+                for tag in self.random.sample(
+                    tags, self.random.randint(1, len(tags))
+                )
+            ),
+            batch_size=BATCH_SIZE
+        )
+        return recipes
+
+    def create_links(self, model, field, users, targets, maximum):
+        weights = zipf_weights(len(targets))
+        links = (
+            model(user=user, **{field: target})
+            for user in users
+            for target in set(self.random.choices(
+                targets, weights=weights,
+                k=self.random.randint(0, maximum)
+            ))
+            if target != user
+        )
+        model.objects.bulk_create(
+            links, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
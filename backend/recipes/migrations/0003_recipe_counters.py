@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes.Favorite', 'recipe', 'recipes.Recipe', 'favorites_count'),
+    ('recipes.PurchaseList', 'recipe', 'recipes.Recipe', 'in_carts_count'),
+    ('recipes.Recipe', 'author', 'users.CustomUser', 'recipes_count'),
+    ('recipes.Follow', 'author', 'users.CustomUser', 'followers_count'),
+)
+
+
+def recount(apps):
+    for source, field, target, counter in COUNTERS:
+        total = (
+            apps.get_model(source).objects
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        apps.get_model(target).objects.update(
+            **{counter: Coalesce(Subquery(total), Value(0))}
+        )
+
+
+def fill_counters(apps, schema_editor):
+    recount(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_sync_models'),
+        ('users', '0002_customuser_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.db.models import Count, F, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes.Favorite', 'recipe', 'recipes.Recipe', 'favorites_count'),
+    ('recipes.PurchaseList', 'recipe', 'recipes.Recipe', 'in_carts_count'),
+    ('recipes.Recipe', 'author', 'users.CustomUser', 'recipes_count'),
+    ('recipes.Follow', 'author', 'users.CustomUser', 'followers_count'),
+)
+
+
+def recount(apps):
+    for source, field, target, counter in COUNTERS:
+        total = (
+            apps.get_model(source).objects
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        apps.get_model(target).objects.update(
+            **{counter: Coalesce(Subquery(total), Value(0))}
+        )
+
+
+def remove_duplicate_entries(apps, schema_editor):
+    for model_name in ('Favorite', 'PurchaseList'):
+        model = apps.get_model('recipes', model_name)
+        keep = model.objects.values('user', 'recipe').annotate(
+            first_id=Min('id')
+        ).values('first_id')
+        model.objects.exclude(id__in=keep).delete()
+    apps.get_model('recipes', 'Follow').objects.filter(user=F('author')).delete()
+    recount(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_entries, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_shopping_lists(apps, schema_editor):
+    item_model = apps.get_model('recipes', 'ShoppingListItem')
+    totals = (
+        apps.get_model('recipes', 'IngredientInRecipe').objects
+        .filter(recipe__customers__isnull=False)
+        .values('recipe__customers__user', 'ingredient')
+        .annotate(total=Coalesce(Sum('amount'), Value(0)))
+        .order_by()
+        .values_list('recipe__customers__user', 'ingredient', 'total')
+    )
+    item_model.objects.bulk_create(
+        (
+            item_model(user_id=user_id, ingredient_id=pk, amount=total)
+            for user_id, pk, total in totals.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_list_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Позиции списков покупок',
+                'constraints': [models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item')],
+            },
+        ),
+        migrations.RunPython(
+            fill_shopping_lists, migrations.RunPython.noop
+        ),
+    ]
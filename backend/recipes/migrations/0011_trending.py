@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.DateTimeField(verbose_name='Учтены события до')),
+                ('recipes_updated', models.PositiveIntegerField(default=0, verbose_name='Обновлено рецептов')),
+            ],
+            options={
+                'verbose_name': 'Расчёт популярности',
+                'verbose_name_plural': 'Расчёты популярности',
+                'ordering': ['-watermark'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярность рецепта',
+                'verbose_name_plural': 'Популярность рецептов',
+                'indexes': [models.Index(fields=['-score'], name='recipe_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_similar_recipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipescore',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Учтено добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipescore',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Учтено добавлений в списки покупок'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versions
+from .response_cache import get_response_key
+
+
+def get_list_version_key(cache_key):
+    return f'{cache_key}:version'
+
+
+def invalidate_cached_list(cache_key):
+    versions.bump_version(get_list_version_key(cache_key))
+
+
+class CachedListMixin:
+    cache_key = None
+
+    def get_cached_list(self):
+        version_key = get_list_version_key(self.cache_key)
+        key = f'{self.cache_key}:{versions.get_version(version_key)}'
+        entry = cache.get(key)
+        if entry is None:
+            serializer = self.get_serializer(
+                self.filter_queryset(self.get_queryset()), many=True
+            )
+            data = serializer.data
+            content = json.dumps(
+                data, cls=DjangoJSONEncoder, sort_keys=True
+            ).encode()
+            entry = {
+                'data': data,
+                'etag': quote_etag(hashlib.md5(content).hexdigest()),
+                'last_modified': versions.get_modified(version_key),
+            }
+            cache.set(key, entry, settings.LIST_CACHE_TIMEOUT)
+        return entry
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        entry = self.get_cached_list()
+        response = get_conditional_response(
+            request,
+            etag=entry['etag'],
+            last_modified=entry['last_modified']
+        )
+        if response is None:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class AnonymousCacheMixin:
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            response = handler(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+        else:
+            key = get_response_key(request)
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(
+                        key, response.data, settings.RESPONSE_CACHE_TIMEOUT
+                    )
+            else:
+                response = Response(data)
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.RESPONSE_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
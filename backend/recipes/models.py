@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from users.models import CustomUser
@@ -27,7 +28,7 @@ class Tag(models.Model):
 
 class Ingredient(models.Model):
     name = models.CharField(
-        max_length=150,
+        max_length=200,
         unique=True,
         verbose_name='Название ингредиента'
     )
@@ -60,6 +61,12 @@ class Recipe(models.Model):
         verbose_name='Картинка',
         upload_to='recipes'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты картинки'
+    )
     text = models.TextField(
        verbose_name='Описание рецепта'
     )
@@ -81,9 +88,34 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            )
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -138,6 +170,10 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name='unique_follow'
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
             )
         ]
 
@@ -166,11 +202,49 @@ class PurchaseList(models.Model):
     class Meta:
         verbose_name = 'Список для покупок'
         verbose_name_plural = 'Списки для покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_purchase'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user}: {self.recipe}'
 
 
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list_items'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+        related_name='+'
+    )
+    amount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} - {self.amount}'
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         CustomUser,
@@ -192,6 +266,94 @@ class Favorite(models.Model):
     class Meta:
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_favorite'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user}: {self.recipe}'
+
+
+class RecipeScore(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Рецепт',
+        related_name='trending'
+    )
+    score = models.FloatField(
+        default=0,
+        verbose_name='Популярность'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Учтено добавлений в избранное'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Учтено добавлений в списки покупок'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='recipe_score_idx')
+        ]
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+
+    def __str__(self):
+        return f'{self.recipe}: {self.score:.2f}'
+
+
+class TrendingRun(models.Model):
+    watermark = models.DateTimeField(
+        verbose_name='Учтены события до'
+    )
+    recipes_updated = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обновлено рецептов'
+    )
+
+    class Meta:
+        ordering = ['-watermark']
+        verbose_name = 'Расчёт популярности'
+        verbose_name_plural = 'Расчёты популярности'
+
+    def __str__(self):
+        return f'{self.watermark:%Y-%m-%d %H:%M}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='neighbours'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Похожий рецепт',
+        related_name='+'
+    )
+    score = models.FloatField(
+        verbose_name='Сходство'
+    )
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            )
+        ]
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar}: {self.score:.2f}'
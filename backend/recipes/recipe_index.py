@@ -0,0 +1,83 @@
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+
+from . import versions
+from .models import IngredientInRecipe
+
+INDEX_VERSION_CACHE_KEY = 'recipes:recipe-index:version'
+INDEX_CACHE_KEY = 'recipes:recipe-index'
+INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+MODE_ANY = 'any'
+MODE_ALL = 'all'
+MODES = (MODE_ANY, MODE_ALL)
+
+
+class RecipeIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = None
+        self._recipes = None
+
+    def invalidate(self):
+        versions.bump_version(INDEX_VERSION_CACHE_KEY)
+
+    def _build(self):
+        recipes = {}
+        rows = IngredientInRecipe.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        )
+        for recipe_id, ingredient_id in rows.iterator():
+            recipes.setdefault(recipe_id, set()).add(ingredient_id)
+        return recipes
+
+    def _get(self):
+        version = versions.get_version(INDEX_VERSION_CACHE_KEY)
+        with self._lock:
+            if self._version != version:
+                key = f'{INDEX_CACHE_KEY}:{version}'
+                recipes = cache.get(key)
+                if recipes is None:
+                    recipes = self._build()
+                    cache.set(key, recipes, INDEX_CACHE_TIMEOUT)
+                postings = {}
+                for recipe_id, ingredient_ids in recipes.items():
+                    for ingredient_id in ingredient_ids:
+                        postings.setdefault(ingredient_id, set()).add(
+                            recipe_id
+                        )
+                self._postings, self._recipes = postings, recipes
+                self._version = version
+            return self._postings, self._recipes
+
+    def _candidates(self, postings, ingredient_ids, mode):
+        matching = [
+            postings.get(ingredient_id, set())
+            for ingredient_id in ingredient_ids
+        ]
+        if mode == MODE_ALL:
+            matching.sort(key=len)
+            matched = set.intersection(*matching) if matching else set()
+            return Counter(dict.fromkeys(matched, len(ingredient_ids)))
+        coverage = Counter()
+        for posting in matching:
+            coverage.update(posting)
+        return coverage
+
+    def match(self, ingredient_ids, mode=MODE_ANY, missing=None):
+        ingredient_ids = set(ingredient_ids)
+        postings, recipes = self._get()
+        result = []
+        coverage = self._candidates(postings, ingredient_ids, mode)
+        for recipe_id, matched in coverage.items():
+            lacking = len(recipes[recipe_id]) - matched
+            if missing is None or lacking <= missing:
+                result.append((recipe_id, matched, lacking))
+        result.sort(key=lambda row: (-row[1], row[2], -row[0]))
+        return result
+
+
+recipe_index = RecipeIndex()
@@ -0,0 +1,30 @@
+import hashlib
+
+from django.utils.http import urlencode
+
+from . import versions
+
+RECIPES_VERSION_CACHE_KEY = 'recipes:version'
+RESPONSE_CACHE_PREFIX = 'recipes:response'
+
+
+def get_version():
+    return versions.get_version(RECIPES_VERSION_CACHE_KEY)
+
+
+def bump_version():
+    versions.bump_version(RECIPES_VERSION_CACHE_KEY)
+
+
+def normalize_query(query_params):
+    return urlencode(sorted(
+        (key, sorted(values)) for key, values in query_params.lists()
+    ), doseq=True)
+
+
+def get_response_key(request):
+    digest = hashlib.md5('|'.join((
+        request.build_absolute_uri(request.path),
+        normalize_query(request.query_params),
+    )).encode()).hexdigest()
+    return f'{RESPONSE_CACHE_PREFIX}:{get_version()}:{digest}'
@@ -0,0 +1,41 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+SEARCH_CONFIG = 'russian'
+
+
+def is_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def build_search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset):
+    if is_postgres(queryset):
+        queryset.update(search_vector=build_search_vector())
+
+
+def search_recipes(queryset, value):
+    if is_postgres(queryset):
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date')
+    return queryset.filter(
+        Q(name__icontains=value) | Q(text__icontains=value)
+    ).annotate(
+        rank=Case(
+            When(name__icontains=value, then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField()
+        )
+    ).order_by('-rank', '-pub_date')
@@ -1,9 +1,48 @@
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import transaction
 from djoser.serializers import UserSerializer as BaseUserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from .images import MAX_UPLOAD_PIXELS, variant_names
 from .models import (CustomUser, Favorite, Follow, Ingredient,
-                     IngredientInRecipe, PurchaseList, Recipe, Tag)
+                     IngredientInRecipe, PurchaseList, Recipe,
+                     ShoppingListItem, Tag)
+from .shopping_list import refresh_shopping_lists
+from .subscriptions import get_subscribed_ids
+
+
+class RecipeImageField(serializers.Field):
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def build_url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
+
+    def to_representation(self, recipe):
+        if not recipe.image:
+            return None
+        variant = self.variant or self.context.get('image_variant')
+        if variant is None:
+            return self.build_url(recipe.image.name)
+        return self.build_url(variant_names(recipe)[variant])
+
+
+class ImageVariantsField(RecipeImageField):
+
+    def to_representation(self, recipe):
+        return {
+            variant: self.build_url(name)
+            for variant, name in variant_names(recipe).items()
+        }
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -36,6 +75,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class AddFavouriteRecipeSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(variant='thumbnail')
 
     class Meta:
         model = Recipe
@@ -43,6 +83,7 @@ class AddFavouriteRecipeSerializer(serializers.ModelSerializer):
 
 
 class PurchaseListRecipeSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(variant='thumbnail')
 
     class Meta:
         model = Recipe
@@ -58,11 +99,7 @@ class ListRecipeUserSerializer(serializers.ModelSerializer):
                   'first_name', 'last_name', 'is_subscribed')
 
     def check_if_is_subscribed(self, user):
-        current_user = self.context['request'].user
-        other_user = user.following.all()
-        if other_user.count() == 0:
-            return False
-        return Follow.objects.filter(user=user, author=current_user).exists()
+        return user.id in get_subscribed_ids(self.context.get('request'))
 
 
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
@@ -84,38 +121,74 @@ class IngredientInRecipeSerializerToCreateRecipe(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount',)
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
 class ListRecipeSerializer(serializers.ModelSerializer):
     author = ListRecipeUserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image = RecipeImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'image_variants', 'text', 'cooking_time')
 
     def get_ingredients(self, obj):
-        qs = IngredientInRecipe.objects.filter(recipe=obj)
+        qs = obj.ingredientinrecipe_set.all()
         return IngredientInRecipeSerializerToCreateRecipe(qs, many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
-        if request is None:
+        if request is None or request.user.is_anonymous:
             return False
         user = request.user
         return Favorite.objects.filter(recipe=obj, user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
-        if request is None:
+        if request is None or request.user.is_anonymous:
             return False
         user = request.user
         return PurchaseList.objects.filter(recipe=obj, user=user).exists()
 
 
+class PantryRecipeSerializer(ListRecipeSerializer):
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    missing_ingredients = serializers.IntegerField(read_only=True)
+
+    class Meta(ListRecipeSerializer.Meta):
+        fields = ListRecipeSerializer.Meta.fields + (
+            'matched_ingredients', 'missing_ingredients'
+        )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100
+    )
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(
         max_length=None,
@@ -133,12 +206,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 
 class ShowFollowerRecipeSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField(
-        max_length=None,
-        required=True,
-        allow_empty_file=False,
-        use_url=True,
-    )
+    image = RecipeImageField(variant='thumbnail')
 
     class Meta:
         model = Recipe
@@ -147,7 +215,9 @@ class ShowFollowerRecipeSerializer(serializers.ModelSerializer):
 
 class ShowFollowersSerializer(serializers.ModelSerializer):
 
-    recipes = ShowFollowerRecipeSerializer(many=True, read_only=True)
+    recipes = ShowFollowerRecipeSerializer(
+        many=True, read_only=True, source='latest_recipes'
+    )
     recipes_count = serializers.SerializerMethodField('count_author_recipes')
     is_subscribed = serializers.SerializerMethodField('check_if_subscribed')
 
@@ -157,16 +227,10 @@ class ShowFollowersSerializer(serializers.ModelSerializer):
                   'last_name', 'is_subscribed', 'recipes', 'recipes_count')
 
     def count_author_recipes(self, user):
-        return len(user.recipes.all())
+        return user.recipes_count
 
     def check_if_subscribed(self, user):
-        current_user = self.context.get('current_user')
-        other_user = user.following.all()
-        if user.is_anonymous:
-            return False
-        if other_user.count() == 0:
-            return False
-        return Follow.objects.filter(user=user, author=current_user).exists()
+        return user.id in get_subscribed_ids(self.context.get('request'))
 
 
 class ShowIngredientsSerializer(serializers.ModelSerializer):
@@ -177,7 +241,7 @@ class ShowIngredientsSerializer(serializers.ModelSerializer):
 
 
 class AddIngredientToRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientInRecipe
@@ -192,10 +256,7 @@ class UserSerializerModified(BaseUserSerializer):
                   'first_name', 'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=request.user, author=obj).exists()
+        return obj.id in get_subscribed_ids(self.context.get('request'))
 
 
 class ShowRecipeSerializer(serializers.ModelSerializer):
@@ -243,39 +304,95 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'tags', 'author', 'ingredients',
                   'name', 'image', 'text', 'cooking_time')
 
+    def validate_image(self, value):
+        width, height = get_image_dimensions(value)
+        if width is None or width * height > MAX_UPLOAD_PIXELS:
+            raise serializers.ValidationError(
+                'Изображение слишком большое или повреждено'
+            )
+        return value
+
+    def validate_ingredients(self, value):
+        ids = {ingredient['id'] for ingredient in value}
+        found = set(
+            Ingredient.objects.filter(id__in=ids).values_list('id', flat=True)
+        )
+        missing = ids - found
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {sorted(missing)}'
+            )
+        return value
+
+    @staticmethod
+    def get_amounts(ingredients_data):
+        return {
+            ingredient['id']: ingredient.get('amount')
+            for ingredient in ingredients_data
+        }
+
+    @staticmethod
+    def create_ingredients(recipe, amounts):
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+        )
+
+    def update_ingredients(self, recipe, amounts):
+        to_delete = []
+        to_update = []
+        changed = set(amounts)
+        for row in IngredientInRecipe.objects.filter(recipe=recipe):
+            if row.ingredient_id not in amounts:
+                to_delete.append(row.id)
+                changed.add(row.ingredient_id)
+                continue
+            amount = amounts.pop(row.ingredient_id)
+            if row.amount != amount:
+                row.amount = amount
+                to_update.append(row)
+            else:
+                changed.discard(row.ingredient_id)
+        if to_delete:
+            IngredientInRecipe.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            IngredientInRecipe.objects.bulk_update(to_update, ['amount'])
+        if amounts:
+            self.create_ingredients(recipe, amounts)
+        if not changed:
+            return
+        user_ids = list(recipe.customers.values_list('user_id', flat=True))
+        if user_ids:
+            refresh_shopping_lists(user_ids, changed)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         author = self.context.get('request').user
         tags_data = validated_data.pop('tags')
         recipe = Recipe.objects.create(
             author=author, **validated_data)
-        recipe.save()
         recipe.tags.set(tags_data)
-        for ingredient in ingredients_data:
-            ingredient_model = ingredient['id']
-            amount = ingredient['amount']
-            IngredientInRecipe.objects.create(
-                ingredient=ingredient_model,
-                recipe=recipe,
-                amount=amount
-            )
-
+        self.create_ingredients(recipe, self.get_amounts(ingredients_data))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredient_data = validated_data.pop('ingredients')
-        IngredientInRecipe.objects.filter(recipe=instance).delete()
-        for new_ingredient in ingredient_data:
-            IngredientInRecipe.objects.create(
-                ingredient=new_ingredient['id'],
-                recipe=instance,
-                amount=new_ingredient['amount']
-            )
-        instance.name = validated_data.pop('name')
-        instance.text = validated_data.pop('text')
-        instance.image = validated_data.pop('image')
-        instance.cooking_time = validated_data.pop('cooking_time')
+        ingredients_data = validated_data.pop('ingredients', None)
+        tags_data = validated_data.pop('tags', None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
         instance.save()
+        if tags_data is not None:
+            instance.tags.set(tags_data)
+        if ingredients_data is not None:
+            self.update_ingredients(
+                instance, self.get_amounts(ingredients_data)
+            )
         return instance
 
     def to_representation(self, instance):
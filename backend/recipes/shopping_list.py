@@ -0,0 +1,185 @@
+import csv
+import itertools
+import os
+import tempfile
+
+import rinoh_typeface_dejavuserif
+from asgiref.sync import sync_to_async
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .models import IngredientInRecipe, ShoppingListItem
+
+FOOTER = 'FoodGram, 2021'
+PDF_FONT = 'DejaVuSerif'
+PDF_FONT_PATH = os.path.join(
+    os.path.dirname(rinoh_typeface_dejavuserif.__file__), 'DejaVuSerif.ttf'
+)
+PDF_FONT_SIZE = 12
+PDF_LINE_HEIGHT = 20
+PDF_MARGIN = 50
+PDF_CHUNK_SIZE = 64 * 1024
+PDF_SPOOL_SIZE = 1024 * 1024
+REBUILD_BATCH_SIZE = 1000
+STREAM_BATCH_SIZE = 100
+
+
+def get_totals(ingredients_in_recipes):
+    return (
+        ingredients_in_recipes
+        .values('recipe__customers__user', 'ingredient')
+        .annotate(total=Coalesce(Sum('amount'), Value(0)))
+        .order_by()
+        .values_list('recipe__customers__user', 'ingredient', 'total')
+    )
+
+
+def recipe_ingredients(recipe_ids):
+    return IngredientInRecipe.objects.filter(
+        recipe__in=recipe_ids
+    ).values('ingredient')
+
+
+def refresh_shopping_lists(user_ids, ingredient_ids):
+    totals = get_totals(IngredientInRecipe.objects.filter(
+        recipe__customers__user__in=user_ids,
+        ingredient__in=ingredient_ids
+    ))
+    items = [
+        ShoppingListItem(user_id=user_id, ingredient_id=pk, amount=total)
+        for user_id, pk, total in totals
+    ]
+    with transaction.atomic(savepoint=False):
+        ShoppingListItem.objects.filter(
+            user__in=user_ids, ingredient__in=ingredient_ids
+        ).exclude(
+            Exists(
+                IngredientInRecipe.objects.filter(
+                    recipe__customers__user=OuterRef('user'),
+                    ingredient=OuterRef('ingredient')
+                )
+            )
+        ).delete()
+        ShoppingListItem.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=['user', 'ingredient'],
+            update_fields=['amount']
+        )
+
+
+def rebuild_shopping_lists(apps=global_apps):
+    item_model = apps.get_model('recipes', 'ShoppingListItem')
+    totals = get_totals(
+        apps.get_model('recipes', 'IngredientInRecipe').objects.filter(
+            recipe__customers__isnull=False
+        )
+    )
+    with transaction.atomic():
+        item_model.objects.all().delete()
+        item_model.objects.bulk_create(
+            (
+                item_model(user_id=user_id, ingredient_id=pk, amount=total)
+                for user_id, pk, total in totals.iterator()
+            ),
+            batch_size=REBUILD_BATCH_SIZE
+        )
+
+
+def get_shopping_list(user):
+    return (
+        ShoppingListItem.objects
+        .filter(user=user)
+        .order_by('ingredient__name')
+        .values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
+        )
+    )
+
+
+def render_txt(items):
+    for name, measurement_unit, amount in items.iterator():
+        yield f'{name} - {amount} {measurement_unit} \n'
+    yield '\n'
+    yield FOOTER
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for name, measurement_unit, amount in items.iterator():
+        yield writer.writerow((name, amount, measurement_unit))
+
+
+def wrap_line(line, width):
+    for part in simpleSplit(line, PDF_FONT, PDF_FONT_SIZE, width) or ['']:
+        while pdfmetrics.stringWidth(part, PDF_FONT, PDF_FONT_SIZE) > width:
+            cut = len(part) - 1
+            while cut > 1 and pdfmetrics.stringWidth(
+                part[:cut], PDF_FONT, PDF_FONT_SIZE
+            ) > width:
+                cut -= 1
+            yield part[:cut]
+            part = part[cut:]
+        yield part
+
+
+def render_pdf(items):
+    if PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(PDF_FONT, PDF_FONT_PATH))
+    width, height = A4
+    lines = itertools.chain(
+        (
+            f'{name} - {amount} {measurement_unit}'
+            for name, measurement_unit, amount in items.iterator()
+        ),
+        ('', FOOTER)
+    )
+    with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_SIZE) as output:
+        page = canvas.Canvas(output, pagesize=A4)
+        page.setFont(PDF_FONT, PDF_FONT_SIZE)
+        y = height - PDF_MARGIN
+        for line in lines:
+            for part in wrap_line(line, width - 2 * PDF_MARGIN):
+                if y < PDF_MARGIN:
+                    page.showPage()
+                    page.setFont(PDF_FONT, PDF_FONT_SIZE)
+                    y = height - PDF_MARGIN
+                page.drawString(PDF_MARGIN, y, part)
+                y -= PDF_LINE_HEIGHT
+        page.save()
+        output.seek(0)
+        yield from iter(lambda: output.read(PDF_CHUNK_SIZE), b'')
+
+
+def next_batch(chunks):
+    return list(itertools.islice(chunks, STREAM_BATCH_SIZE))
+
+
+async def stream(chunks):
+    chunks = iter(chunks)
+    while True:
+        batch = await sync_to_async(next_batch)(chunks)
+        if not batch:
+            return
+        for chunk in batch:
+            yield chunk
+
+
+FORMATS = {
+    'txt': (render_txt, 'text/plain; charset=utf-8', 'wishlist.txt'),
+    'csv': (render_csv, 'text/csv; charset=utf-8', 'wishlist.csv'),
+    'pdf': (render_pdf, 'application/pdf', 'wishlist.pdf'),
+}
@@ -0,0 +1,114 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .counters import change_counters
+from .images import schedule_processing
+from .ingredient_index import ingredient_index
+from .mixins import invalidate_cached_list
+from .models import (CustomUser, Favorite, Follow, Ingredient,
+                     IngredientInRecipe, PurchaseList, Recipe, Tag)
+from .recipe_index import recipe_index
+from .response_cache import bump_version
+from .search import update_search_vector
+from .shopping_list import recipe_ingredients, refresh_shopping_lists
+
+TAGS_CACHE_KEY = 'recipes:tags'
+TAG_CHOICES_CACHE_KEY = 'recipes:tag-choices'
+INGREDIENTS_CACHE_KEY = 'recipes:ingredients'
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+    transaction.on_commit(recipe_index.invalidate)
+    transaction.on_commit(
+        lambda: invalidate_cached_list(INGREDIENTS_CACHE_KEY)
+    )
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tags_cache(sender, **kwargs):
+    cache.delete(TAG_CHOICES_CACHE_KEY)
+    transaction.on_commit(lambda: invalidate_cached_list(TAGS_CACHE_KEY))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=PurchaseList)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counters(sender, [instance], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=PurchaseList)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+def decrement_counter(sender, instance, **kwargs):
+    change_counters(sender, [instance], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    schedule_processing(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields, **kwargs):
+    if update_fields is None or {'name', 'text'} & set(update_fields):
+        update_search_vector(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_recipe_index(sender, update_fields=None, **kwargs):
+    if update_fields is None:
+        transaction.on_commit(recipe_index.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=IngredientInRecipe)
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver([post_save, post_delete], sender=Tag)
+def bump_recipes_version(sender, **kwargs):
+    transaction.on_commit(bump_version)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def bump_recipes_version_for_user(sender, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=PurchaseList)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        refresh_shopping_lists(
+            [instance.user_id], recipe_ingredients([instance.recipe_id])
+        )
+
+
+@receiver(post_delete, sender=PurchaseList)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    refresh_shopping_lists(
+        [instance.user_id], recipe_ingredients([instance.recipe_id])
+    )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(sender, instance, **kwargs):
+    user_ids = list(
+        instance.customers.values_list('user_id', flat=True)
+    )
+    if not user_ids:
+        return
+    ingredient_ids = list(
+        instance.ingredientinrecipe_set.values_list(
+            'ingredient_id', flat=True
+        )
+    )
+    transaction.on_commit(
+        lambda: refresh_shopping_lists(user_ids, ingredient_ids)
+    )
@@ -0,0 +1,104 @@
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .models import IngredientInRecipe, Recipe, SimilarRecipe
+from .response_cache import bump_version
+
+TOP_K = 10
+TAG_WEIGHT = 0.5
+BATCH_SIZE = 256
+INSERT_BATCH_SIZE = 1000
+
+
+def load_pairs(queryset, recipe_ids):
+    pairs = np.array(list(queryset.iterator()), dtype=np.int64)
+    pairs = pairs.reshape(-1, 2)
+    return pairs[np.isin(pairs[:, 0], recipe_ids)]
+
+
+def build_features(recipe_ids):
+    ingredients = load_pairs(
+        IngredientInRecipe.objects.values_list('recipe_id', 'ingredient_id'),
+        recipe_ids
+    )
+    tags = load_pairs(
+        Recipe.tags.through.objects.values_list('recipe_id', 'tag_id'),
+        recipe_ids
+    )
+    ingredient_ids, ingredient_columns = np.unique(
+        ingredients[:, 1], return_inverse=True
+    )
+    tag_ids, tag_columns = np.unique(tags[:, 1], return_inverse=True)
+    rows = np.concatenate((
+        np.searchsorted(recipe_ids, ingredients[:, 0]),
+        np.searchsorted(recipe_ids, tags[:, 0])
+    ))
+    columns = np.concatenate((
+        ingredient_columns, tag_columns + len(ingredient_ids)
+    ))
+    weights = np.concatenate((
+        np.ones(len(ingredients)), np.full(len(tags), TAG_WEIGHT)
+    ))
+    features = sparse.csr_matrix(
+        (weights, (rows, columns)),
+        shape=(len(recipe_ids), len(ingredient_ids) + len(tag_ids)),
+        dtype=np.float32
+    )
+    features.sum_duplicates()
+    norms = np.sqrt(np.asarray(features.multiply(features).sum(axis=1)))
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(features.multiply(1 / norms))
+
+
+def top_neighbours(features, start, stop, top):
+    batch = features[start:stop].T.toarray()
+    scores = np.ascontiguousarray((features @ batch).T)
+    rows = np.arange(stop - start)
+    scores[rows, rows + start] = 0
+    top = min(top, scores.shape[1] - 1)
+    if top < 1:
+        return scores[:, :0].astype(np.int64), scores[:, :0]
+    columns = np.argpartition(scores, -top, axis=1)[:, -top:]
+    top_scores = np.take_along_axis(scores, columns, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return (
+        np.take_along_axis(columns, order, axis=1),
+        np.take_along_axis(top_scores, order, axis=1)
+    )
+
+
+def get_neighbours(recipe_ids, features, start, stop, top):
+    columns, scores = top_neighbours(features, start, stop, top)
+    return [
+        SimilarRecipe(
+            recipe_id=int(recipe_ids[start + offset]),
+            similar_id=int(recipe_ids[column]),
+            score=float(score)
+        )
+        for offset in range(stop - start)
+        for column, score in zip(columns[offset], scores[offset])
+        if score > 0
+    ]
+
+
+def compute_similar_recipes(top=TOP_K):
+    recipe_ids = np.array(
+        Recipe.objects.order_by('id').values_list('id', flat=True),
+        dtype=np.int64
+    )
+    features = build_features(recipe_ids)
+    created = 0
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        for start in range(0, len(recipe_ids), BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, len(recipe_ids))
+            neighbours = get_neighbours(
+                recipe_ids, features, start, stop, top
+            )
+            SimilarRecipe.objects.bulk_create(
+                neighbours, batch_size=INSERT_BATCH_SIZE
+            )
+            created += len(neighbours)
+        transaction.on_commit(bump_version)
+    return created
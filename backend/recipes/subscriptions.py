@@ -0,0 +1,15 @@
+from .models import Follow
+
+
+def get_subscribed_ids(request):
+    if request is None or request.user.is_anonymous:
+        return frozenset()
+    subscribed_ids = getattr(request, '_subscribed_ids', None)
+    if subscribed_ids is None:
+        subscribed_ids = frozenset(
+            Follow.objects.filter(user=request.user).values_list(
+                'author_id', flat=True
+            )
+        )
+        request._subscribed_ids = subscribed_ids
+    return subscribed_ids
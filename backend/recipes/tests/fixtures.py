@@ -0,0 +1,100 @@
+import base64
+import io
+
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from recipes.counters import recount
+from recipes.models import (Favorite, Follow, Ingredient, IngredientInRecipe,
+                            PurchaseList, Recipe, Tag)
+from recipes.shopping_list import rebuild_shopping_lists
+from users.models import CustomUser
+
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def create_user(index, **kwargs):
+    return CustomUser.objects.create_user(
+        username=f'user{index}',
+        email=f'user{index}@foodgram.ru',
+        password='Pa$$w0rd-foodgram',
+        first_name='Имя',
+        last_name='Фамилия',
+        **kwargs
+    )
+
+
+def get_token(user):
+    return Token.objects.get_or_create(user=user)[0].key
+
+
+def create_tags():
+    return Tag.objects.bulk_create(
+        Tag(name=name, color=color, slug=slug) for name, color, slug in TAGS
+    )
+
+
+def create_ingredients(count=30):
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {index}', measurement_unit='г')
+        for index in range(count)
+    )
+
+
+def create_recipes(authors, tags, ingredients, count,
+                   ingredients_per_recipe=8):
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            author=authors[index % len(authors)],
+            name=f'Рецепт {index}',
+            image='recipes/test.png',
+            text='Описание рецепта',
+            cooking_time=10 + index
+        )
+        for index in range(count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tag)
+        for index, recipe in enumerate(recipes)
+        for tag in tags[:index % len(tags) + 1]
+    )
+    IngredientInRecipe.objects.bulk_create(
+        IngredientInRecipe(
+            recipe=recipe,
+            ingredient=ingredients[(index + shift) % len(ingredients)],
+            amount=shift + 1
+        )
+        for index, recipe in enumerate(recipes)
+        for shift in range(ingredients_per_recipe)
+    )
+    recount()
+    return recipes
+
+
+def add_to_lists(user, recipes):
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=recipe) for recipe in recipes
+    )
+    PurchaseList.objects.bulk_create(
+        PurchaseList(user=user, recipe=recipe) for recipe in recipes
+    )
+    recount()
+    rebuild_shopping_lists()
+
+
+def follow(user, authors):
+    Follow.objects.bulk_create(
+        Follow(user=user, author=author) for author in authors
+    )
+    recount()
@@ -0,0 +1,119 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from recipes import images
+from recipes.models import Recipe
+from recipes.tests import fixtures
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def save_image(name, mode, size):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, 'PNG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def open_image(name):
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    return image
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeImagesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = fixtures.create_user(1)
+        cls.recipe = fixtures.create_recipes(
+            [author], fixtures.create_tags(), fixtures.create_ingredients(2),
+            1, ingredients_per_recipe=2
+        )[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_variants_of_opaque_image(self):
+        name = save_image('recipes/photo.png', 'RGB', (2400, 1200))
+        variants = images.build_variants(name)
+        self.assertEqual(set(variants), set(images.VARIANTS))
+        expected = {
+            'full': ('JPEG', (1920, 960)),
+            'full_webp': ('WEBP', (1920, 960)),
+            'thumbnail': ('JPEG', (480, 240)),
+            'thumbnail_webp': ('WEBP', (480, 240)),
+        }
+        for variant, (image_format, size) in expected.items():
+            with self.subTest(variant=variant):
+                image = open_image(variants[variant])
+                self.assertEqual(image.format, image_format)
+                self.assertEqual(image.size, size)
+
+    def test_variants_keep_transparency(self):
+        name = save_image('recipes/icon.png', 'RGBA', (100, 100))
+        variants = images.build_variants(name)
+        self.assertEqual(open_image(variants['full']).format, 'PNG')
+        self.assertEqual(open_image(variants['full']).mode, 'RGBA')
+        self.assertEqual(open_image(variants['thumbnail']).size, (100, 100))
+
+    def test_too_large_image_is_rejected(self):
+        name = save_image('recipes/huge.png', 'RGB', (100, 100))
+        with mock.patch('recipes.images.MAX_UPLOAD_PIXELS', 100):
+            with self.assertRaises(ValueError):
+                images.build_variants(name)
+
+    def test_variant_names_before_processing(self):
+        self.assertEqual(
+            images.variant_names(self.recipe),
+            {variant: 'recipes/test.png' for variant in images.VARIANTS}
+        )
+
+    @mock.patch('recipes.images.close_old_connections')
+    def test_process_recipe_image(self, close_old_connections):
+        name = save_image('recipes/photo.png', 'RGB', (600, 300))
+        Recipe.objects.filter(pk=self.recipe.pk).update(image=name)
+        images.process_recipe_image(self.recipe.pk, name)
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(set(recipe.image_variants), set(images.VARIANTS))
+        self.assertEqual(recipe.image.name, recipe.image_variants['full'])
+        self.assertTrue(images.is_processed(recipe))
+        self.assertEqual(images.variant_names(recipe), recipe.image_variants)
+        self.assertFalse(default_storage.exists(name))
+        for variant_name in recipe.image_variants.values():
+            self.assertTrue(default_storage.exists(variant_name))
+
+    @mock.patch('recipes.images.close_old_connections')
+    def test_replaced_image_is_discarded(self, close_old_connections):
+        name = save_image('recipes/old.png', 'RGB', (600, 300))
+        Recipe.objects.filter(pk=self.recipe.pk).update(image=name)
+        built = {}
+        build_variants = images.build_variants
+
+        def replace_during_processing(image_name):
+            Recipe.objects.filter(pk=self.recipe.pk).update(
+                image='recipes/new.png'
+            )
+            built.update(build_variants(image_name))
+            return built
+
+        with mock.patch(
+            'recipes.images.build_variants', replace_during_processing
+        ):
+            images.process_recipe_image(self.recipe.pk, name)
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.image.name, 'recipes/new.png')
+        self.assertEqual(recipe.image_variants, {})
+        self.assertTrue(built)
+        for variant_name in built.values():
+            self.assertFalse(default_storage.exists(variant_name))
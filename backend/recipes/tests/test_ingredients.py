@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from recipes.ingredient_index import ingredient_index, normalize
+from recipes.models import Ingredient
+
+NAMES = (
+    'соль', 'Соль морская', 'морская соль', 'фасоль', 'Ёжевика', 'свёкла',
+    'мёд липовый',
+)
+
+
+class LoadIngredientsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def load(self, extension, content, *args):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix=extension, encoding='utf-8', delete=False
+        ) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        output = StringIO()
+        call_command('load_ingredients', file.name, *args, stdout=output)
+        return output.getvalue()
+
+    def get_ingredients(self):
+        return dict(Ingredient.objects.values_list('name', 'measurement_unit'))
+
+    def test_load_csv(self):
+        output = self.load('.csv', 'мука,г\n соль , г \nбез единицы\n')
+        self.assertIn('Добавлено: 2, обновлено: 0, без изменений: 0', output)
+        self.assertEqual(self.get_ingredients(), {'мука': 'г', 'соль': 'г'})
+
+    def test_load_json_across_chunks(self):
+        content = json.dumps(
+            [
+                {'title': f'ингредиент {index}', 'dimension': 'г'}
+                for index in range(10)
+            ],
+            ensure_ascii=False, indent=2
+        )
+        path = 'recipes.management.commands.load_ingredients.JSON_CHUNK_SIZE'
+        with mock.patch(path, 7):
+            output = self.load('.json', content, '--batch-size', '3')
+        self.assertIn('Добавлено: 10', output)
+        self.assertEqual(
+            self.get_ingredients(),
+            {f'ингредиент {index}': 'г' for index in range(10)}
+        )
+
+    def test_invalid_json(self):
+        with self.assertRaises(CommandError):
+            self.load('.json', '[{"title": "мука", "dimension": "г"}, {')
+
+    def test_update_and_skip(self):
+        Ingredient.objects.create(name='мука', measurement_unit='кг')
+        output = self.load('.csv', 'мука,г\nсоль,г\n')
+        self.assertIn('Добавлено: 1, обновлено: 1, без изменений: 0', output)
+        output = self.load('.csv', 'мука,г\nсоль,г\n')
+        self.assertIn('Добавлено: 0, обновлено: 0, без изменений: 2', output)
+        self.assertEqual(self.get_ingredients(), {'мука': 'г', 'соль': 'г'})
+
+    def test_dry_run(self):
+        Ingredient.objects.create(name='мука', measurement_unit='кг')
+        output = self.load('.csv', 'мука,г\nсоль,г\n', '--dry-run')
+        self.assertIn('Добавлено: 1, обновлено: 1', output)
+        self.assertEqual(self.get_ingredients(), {'мука': 'кг'})
+
+    def test_unsupported_or_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.load('.txt', 'мука,г\n')
+        with self.assertRaises(CommandError):
+            call_command('load_ingredients', '/nonexistent/ingredients.csv')
+
+    def test_load_refreshes_autocomplete(self):
+        self.assertEqual(ingredient_index.search('мук'), [])
+        self.load('.csv', 'мука,г\n')
+        self.assertEqual(
+            [item['name'] for item in ingredient_index.search('мук')],
+            ['мука']
+        )
+
+
+class IngredientAutocompleteTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г') for name in NAMES
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, **kwargs):
+        return [
+            item['name'] for item in ingredient_index.search(query, **kwargs)
+        ]
+
+    def test_normalize(self):
+        self.assertEqual(normalize(' Ёжевика '), 'ежевика')
+        self.assertEqual(normalize('СВЁКЛА'), 'свекла')
+
+    def test_prefix_matches_rank_before_word_matches(self):
+        self.assertEqual(
+            self.search('Сол'), ['соль', 'Соль морская', 'морская соль']
+        )
+        self.assertEqual(
+            self.search('морск'), ['морская соль', 'Соль морская']
+        )
+        self.assertEqual(self.search('ль'), [])
+
+    def test_yo_and_ye_are_equal(self):
+        for query in ('ёж', 'еж', 'ЕЖ'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), ['Ёжевика'])
+        self.assertEqual(self.search('свек'), ['свёкла'])
+        self.assertEqual(self.search('мед'), ['мёд липовый'])
+        self.assertEqual(self.search('липов'), ['мёд липовый'])
+
+    def test_limit(self):
+        self.assertEqual(len(self.search('', limit=3)), 3)
+        self.assertEqual(self.search('сол', limit=2), ['соль', 'Соль морская'])
+
+    def test_index_follows_changes(self):
+        self.assertEqual(self.search('солод'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='Солод', measurement_unit='г')
+        self.assertEqual(self.search('солод'), ['Солод'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.filter(name='Солод').get().delete()
+        self.assertEqual(self.search('солод'), [])
+
+    def test_api_uses_index(self):
+        response = self.client.get(
+            reverse('ingredients-list'), {'name': 'ёж'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in response.json()], ['Ёжевика']
+        )
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.mixins import get_list_version_key
+from recipes.models import Ingredient, Tag
+from recipes.signals import INGREDIENTS_CACHE_KEY, TAGS_CACHE_KEY
+from recipes.tests import fixtures
+
+CHANGED_AT = 1_600_000_000
+
+
+class CachedListTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        fixtures.create_tags()
+        fixtures.create_ingredients(3)
+
+    def setUp(self):
+        cache.clear()
+
+    def drop_entries(self, cache_key):
+        version = cache.get(get_list_version_key(cache_key))
+        cache.delete(f'{cache_key}:{version}')
+
+    def test_last_modified_survives_refill(self):
+        for name, cache_key in (
+            ('tags-list', TAGS_CACHE_KEY),
+            ('ingredients-list', INGREDIENTS_CACHE_KEY),
+        ):
+            with self.subTest(name=name):
+                with mock.patch('time.time', return_value=CHANGED_AT):
+                    response = self.client.get(reverse(name))
+                self.assertEqual(
+                    response['Last-Modified'], http_date(CHANGED_AT)
+                )
+                self.drop_entries(cache_key)
+                response = self.client.get(reverse(name))
+                self.assertEqual(
+                    response['Last-Modified'], http_date(CHANGED_AT)
+                )
+                response = self.client.get(
+                    reverse(name),
+                    HTTP_IF_MODIFIED_SINCE=http_date(CHANGED_AT)
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_304_NOT_MODIFIED
+                )
+
+    def test_change_moves_last_modified(self):
+        for name, model in (
+            ('tags-list', Tag), ('ingredients-list', Ingredient),
+        ):
+            with self.subTest(name=name):
+                with mock.patch('time.time', return_value=CHANGED_AT):
+                    etag = self.client.get(reverse(name))['ETag']
+                with mock.patch('time.time', return_value=CHANGED_AT + 60):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        instance = model.objects.first()
+                        instance.name = f'{instance.name} новый'
+                        instance.save()
+                response = self.client.get(
+                    reverse(name),
+                    HTTP_IF_MODIFIED_SINCE=http_date(CHANGED_AT)
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    response['Last-Modified'], http_date(CHANGED_AT + 60)
+                )
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertIn(
+                    instance.name,
+                    [item['name'] for item in response.json()]
+                )
@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.db.models import QuerySet, Sum
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import (Favorite, IngredientInRecipe, PurchaseList, Recipe,
+                            ShoppingListItem)
+from recipes.tests import fixtures
+
+
+class BulkListsTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = fixtures.create_user(0)
+        cls.recipes = fixtures.create_recipes(
+            [fixtures.create_user(1)], fixtures.create_tags(),
+            fixtures.create_ingredients(4), 3, ingredients_per_recipe=2
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def post_racing(self, name, model, recipe):
+        bulk_create = QuerySet.bulk_create
+
+        def insert_first(queryset, objs, **kwargs):
+            if queryset.model is model and kwargs.get('ignore_conflicts'):
+                model.objects.create(user=self.user, recipe=recipe)
+            return bulk_create(queryset, objs, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', insert_first):
+            return self.client.post(
+                reverse(name),
+                {'recipes': [recipe.id for recipe in self.recipes]},
+                format='json'
+            )
+
+    def test_conflicting_rows_are_not_reported_as_added(self):
+        for name, model, counter in (
+            ('bulk_favorite', Favorite, 'favorites_count'),
+            ('bulk_shopping_cart', PurchaseList, 'in_carts_count'),
+        ):
+            with self.subTest(name=name):
+                response = self.post_racing(name, model, self.recipes[1])
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    [
+                        result['status']
+                        for result in response.json()['results']
+                    ],
+                    ['added', 'exists', 'added']
+                )
+                self.assertEqual(
+                    list(
+                        Recipe.objects.filter(
+                            pk__in=[recipe.pk for recipe in self.recipes]
+                        ).order_by('pk').values_list(counter, flat=True)
+                    ),
+                    [1, 1, 1]
+                )
+        self.assertEqual(
+            dict(
+                ShoppingListItem.objects.filter(user=self.user).values_list(
+                    'ingredient', 'amount'
+                )
+            ),
+            dict(
+                IngredientInRecipe.objects.values('ingredient').annotate(
+                    total=Sum('amount')
+                ).values_list('ingredient', 'total')
+            )
+        )
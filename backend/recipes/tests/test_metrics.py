@@ -0,0 +1,44 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+
+class MetricsTest(TestCase):
+
+    def get(self, token=None):
+        headers = {}
+        if token is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return self.client.get(reverse('metrics'), **headers)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_disabled_without_token(self):
+        for token in (None, '', 'None'):
+            with self.subTest(token=token):
+                self.assertEqual(
+                    self.get(token).status_code, status.HTTP_403_FORBIDDEN
+                )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        for token in (None, '', 'wrong', 'secret '):
+            with self.subTest(token=token):
+                self.assertEqual(
+                    self.get(token).status_code, status.HTTP_403_FORBIDDEN
+                )
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Token secret'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_with_token(self):
+        self.client.get(reverse('tags-list'))
+        response = self.get('secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            b'foodgram_http_requests_total{method="GET",status="200",'
+            b'view="tags-list"}',
+            response.content
+        )
+        self.assertNotIn(b'view="metrics"', response.content)
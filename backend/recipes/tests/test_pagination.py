@@ -0,0 +1,81 @@
+import base64
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe
+from recipes.tests import fixtures
+
+
+def encode(value):
+    return base64.urlsafe_b64encode(value).decode()
+
+
+class PaginationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = fixtures.create_user(0)
+        cls.authors = [fixtures.create_user(index) for index in range(1, 4)]
+        cls.recipes = fixtures.create_recipes(
+            cls.authors, fixtures.create_tags(),
+            fixtures.create_ingredients(4), 7, ingredients_per_recipe=2
+        )
+        fixtures.follow(cls.user, cls.authors)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_walks_every_recipe_once(self):
+        url = f'{reverse("recipes-list")}?cursor=&limit=3&count=exact'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertEqual(data['count'], len(self.recipes))
+            seen.extend(recipe['id'] for recipe in data['results'])
+            url = data['next']
+        self.assertEqual(
+            seen,
+            list(Recipe.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            ))
+        )
+
+    def test_invalid_or_tampered_cursor(self):
+        for cursor in (
+            'не-base64',
+            'abc',
+            encode(b'\xff\xfe'),
+            encode('без разделителя'.encode()),
+            encode(b'not-a-date|1'),
+            encode(b'2021-01-01T00:00:00|abc'),
+            encode(b'2021-01-01T00:00:00|1|2'),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('recipes-list'), {'cursor': cursor}
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+                self.assertEqual(response.json()['detail'], 'Неверный курсор')
+
+    def test_cursor_requires_default_ordering(self):
+        response = self.client.get(
+            reverse('recipes-list'), {'cursor': '', 'ordering': 'trending'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.json())
+
+    def test_subscriptions_limit(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('users_subs'), {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(len(response.json()['results']), 2)
+        response = self.client.get(response.json()['next'])
+        self.assertEqual(len(response.json()['results']), 1)
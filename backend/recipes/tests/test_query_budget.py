@@ -0,0 +1,542 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import (Favorite, Follow, IngredientInRecipe, PurchaseList,
+                            Recipe, RecipeScore)
+from recipes.recipe_index import recipe_index
+from recipes.search import update_search_vector
+from recipes.similarity import compute_similar_recipes
+from recipes.tests import fixtures
+from recipes.trending import compute_trending
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTestCase(APITestCase):
+    recipes_count = 24
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = fixtures.create_user(0)
+        cls.authors = [fixtures.create_user(index) for index in range(1, 9)]
+        cls.admin = fixtures.create_user(
+            'admin', is_staff=True, is_superuser=True
+        )
+        cls.tags = fixtures.create_tags()
+        cls.ingredients = fixtures.create_ingredients()
+        cls.recipes = fixtures.create_recipes(
+            cls.authors, cls.tags, cls.ingredients, cls.recipes_count
+        )
+        fixtures.add_to_lists(cls.user, cls.recipes[:12])
+        fixtures.follow(cls.user, cls.authors[:4])
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def get_client(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Token {fixtures.get_token(user)}'
+            )
+        return client
+
+    def count_queries(self, method, url, user=None, **kwargs):
+        client = self.get_client(user)
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, **kwargs)
+            if response.streaming:
+                async_to_sync(self.consume)(response)
+        return response, context
+
+    async def consume(self, response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    def assertMaxQueries(self, budget, method, url, user=None, **kwargs):
+        response, context = self.count_queries(method, url, user, **kwargs)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries
+        )
+        self.assertLessEqual(
+            len(context), budget,
+            f'{method.upper()} {url}: {len(context)} запросов '
+            f'при бюджете {budget}\n{queries}'
+        )
+        return response
+
+    def assertConstantQueries(self, url, grow, user=None):
+        _, before = self.count_queries('get', url, user)
+        grow()
+        _, after = self.count_queries('get', url, user)
+        self.assertEqual(
+            len(before), len(after),
+            f'GET {url}: число запросов растёт вместе с данными '
+            f'({len(before)} -> {len(after)})'
+        )
+
+
+class RecipesQueryBudgetTest(QueryBudgetTestCase):
+
+    def test_recipes_list(self):
+        url = reverse('recipes-list')
+        for user, budget in ((None, 5), (self.user, 7)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_recipes_list_filters(self):
+        url = (f'{reverse("recipes-list")}?tags=breakfast&tags=lunch'
+               f'&author={self.authors[0].id}&is_favorited=1'
+               '&is_in_shopping_cart=1')
+        self.get_client().get(url)
+        for user, budget in ((None, 5), (self.user, 7)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_recipes_search(self):
+        by_name, by_text = self.recipes[0], self.recipes[5]
+        Recipe.objects.filter(pk=by_name.pk).update(
+            name='Рецепт с карамелью'
+        )
+        Recipe.objects.filter(pk=by_text.pk).update(
+            text='Полить карамелью', pub_date=timezone.now()
+        )
+        update_search_vector(Recipe.objects.all())
+        url = f'{reverse("recipes-list")}?search=карамел'
+        response = self.assertMaxQueries(5, 'get', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [by_name.id, by_text.id]
+        )
+        for query, expected in (
+            (f'author={by_text.author_id}', [by_text.id]),
+            ('tags=lunch', [by_text.id]),
+            (f'author={by_name.author_id}&tags=lunch', []),
+        ):
+            with self.subTest(query=query):
+                response = self.get_client().get(f'{url}&{query}')
+                self.assertEqual(
+                    [recipe['id'] for recipe in response.json()['results']],
+                    expected
+                )
+        response = self.get_client().get(f'{url}&cursor=')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipes_list_cursor(self):
+        url = f'{reverse("recipes-list")}?cursor=&limit=6'
+        response = self.assertMaxQueries(6, 'get', url, self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.assertMaxQueries(
+            6, 'get', response.json()['next'], self.user
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_recipes_list_has_no_n_plus_one(self):
+        url = reverse('recipes-list')
+        for user in (None, self.user):
+            with self.subTest(user=user):
+                _, small = self.count_queries('get', f'{url}?limit=2', user)
+                _, large = self.count_queries('get', f'{url}?limit=12', user)
+                self.assertEqual(len(small), len(large))
+
+    def test_recipes_anonymous_cache(self):
+        recipe = self.recipes[0]
+        for url in (reverse('recipes-list'),
+                    reverse('recipes-detail', args=[recipe.id])):
+            with self.subTest(url=url):
+                self.count_queries('get', url)
+                response = self.assertMaxQueries(0, 'get', url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('Authorization', response['Vary'])
+                response = self.assertMaxQueries(6, 'get', url, self.user)
+                self.assertIn('private', response['Cache-Control'])
+        with mock.patch('recipes.images.executor'):
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe.name = 'Переименованный рецепт'
+                recipe.save()
+        response = self.get_client().get(
+            reverse('recipes-detail', args=[recipe.id])
+        )
+        self.assertEqual(response.json()['name'], recipe.name)
+
+    def test_recipes_feed(self):
+        url = f'{reverse("recipes-feed")}?limit=6'
+        followed = {author.id for author in self.authors[:4]}
+        response = self.assertMaxQueries(5, 'get', url, self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertTrue(data['results'])
+        self.assertLessEqual(
+            {recipe['author']['id'] for recipe in data['results']}, followed
+        )
+        response = self.assertMaxQueries(5, 'get', data['next'], self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.get_client().get(url).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_recipes_feed_has_no_n_plus_one(self):
+        url = reverse('recipes-feed')
+        _, small = self.count_queries('get', f'{url}?limit=2', self.user)
+        _, large = self.count_queries('get', f'{url}?limit=12', self.user)
+        self.assertEqual(len(small), len(large))
+
+    def test_recipes_trending(self):
+        compute_trending()
+        url = f'{reverse("recipes-list")}?ordering=trending&limit=6'
+        scored = {recipe.id for recipe in self.recipes[:12]}
+        for user, budget in ((None, 5), (self.user, 7)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                results = response.json()['results']
+                self.assertTrue(results)
+                self.assertLessEqual(
+                    {recipe['id'] for recipe in results}, scored
+                )
+        self.assertEqual(
+            [recipe['id'] for recipe in results],
+            list(RecipeScore.objects.order_by(
+                '-score', '-recipe__pub_date', '-recipe_id'
+            ).values_list('recipe_id', flat=True)[:6])
+        )
+        response = self.get_client().get(f'{url}&cursor=')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.json())
+
+    def test_recipes_similar(self):
+        compute_similar_recipes(top=5)
+        recipe = self.recipes[0]
+        url = reverse('recipes-similar', args=[recipe.id])
+        for user, budget in ((None, 4), (self.user, 6)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                ids = [item['id'] for item in response.json()]
+                self.assertTrue(ids)
+                self.assertLessEqual(len(ids), 5)
+                self.assertNotIn(recipe.id, ids)
+        self.assertEqual(
+            self.get_client().get(
+                reverse('recipes-similar', args=[0])
+            ).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+    def test_recipes_pantry(self):
+        recipe_index.invalidate()
+        ingredients = '&'.join(
+            f'ingredients={ingredient.id}'
+            for ingredient in self.ingredients[:3]
+        )
+        url = f'{reverse("recipes-pantry")}?{ingredients}&limit=12'
+        for user, budget in ((None, 4), (self.user, 5)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.json()['results'])
+
+    def test_recipe_detail(self):
+        url = reverse('recipes-detail', args=[self.recipes[0].id])
+        for user, budget in ((None, 4), (self.user, 6)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_recipe_create_update_delete(self):
+        author = self.authors[0]
+        data = {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 15,
+            'image': fixtures.make_image(),
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in self.ingredients
+            ],
+        }
+        response = self.assertMaxQueries(
+            17, 'post', reverse('recipes-list'), author,
+            data=data, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse('recipes-detail', args=[response.json()['id']])
+        data['ingredients'] = [
+            {'id': ingredient.id, 'amount': 20}
+            for ingredient in self.ingredients[5:]
+        ]
+        response = self.assertMaxQueries(
+            22, 'put', url, author, data=data, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.assertMaxQueries(13, 'delete', url, author)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_favorite_and_shopping_cart(self):
+        recipe = self.recipes[-1]
+        budgets = (
+            ('add_recipe_to_favorite', Favorite, 'favorites_count', 6, 7),
+            ('add_recipe_to_shopping_cart', PurchaseList, 'in_carts_count',
+             9, 10),
+        )
+        for name, model, counter, add_budget, remove_budget in budgets:
+            with self.subTest(name=name):
+                url = reverse(name, args=[recipe.id])
+                response = self.assertMaxQueries(
+                    add_budget, 'get', url, self.user
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_201_CREATED
+                )
+                response = self.get_client(self.user).get(url)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                response = self.assertMaxQueries(
+                    remove_budget, 'delete', url, self.user
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_204_NO_CONTENT
+                )
+                self.assertCountersActual(model, counter, [recipe])
+
+    def get_statuses(self, response):
+        return [result['status'] for result in response.json()['results']]
+
+    def assertCountersActual(self, model, counter, recipes):
+        self.assertEqual(
+            dict(
+                Recipe.objects.filter(
+                    pk__in=[recipe.pk for recipe in recipes]
+                ).values_list('pk', counter)
+            ),
+            {
+                recipe.pk: model.objects.filter(recipe=recipe).count()
+                for recipe in recipes
+            }
+        )
+
+    def test_bulk_favorite_and_shopping_cart(self):
+        recipes = self.recipes[10:16]
+        recipe_ids = [recipe.id for recipe in recipes] + [10 ** 6]
+        budgets = (
+            ('bulk_favorite', Favorite, 'favorites_count', 7, 13),
+            ('bulk_shopping_cart', PurchaseList, 'in_carts_count', 10, 31),
+        )
+        for name, model, counter, add_budget, remove_budget in budgets:
+            with self.subTest(name=name):
+                url = reverse(name)
+                response = self.assertMaxQueries(
+                    add_budget, 'post', url, self.user,
+                    data={'recipes': recipe_ids}, format='json'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    self.get_statuses(response),
+                    ['exists'] * 2 + ['added'] * 4 + ['not_found']
+                )
+                self.assertCountersActual(model, counter, recipes)
+                response = self.assertMaxQueries(
+                    remove_budget, 'delete', url, self.user,
+                    data={'recipes': recipe_ids}, format='json'
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    self.get_statuses(response),
+                    ['removed'] * 6 + ['not_found']
+                )
+                self.assertCountersActual(model, counter, recipes)
+
+    def assertShoppingListActual(self, user):
+        response = self.assertMaxQueries(
+            2, 'get', reverse('shopping_list'), user
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = dict(
+            IngredientInRecipe.objects.filter(
+                recipe__customers__user=user
+            ).values('ingredient').annotate(
+                total=Sum('amount')
+            ).values_list('ingredient', 'total')
+        )
+        self.assertEqual(
+            {item['id']: item['amount'] for item in response.json()},
+            expected
+        )
+
+    def test_shopping_list(self):
+        self.assertShoppingListActual(self.user)
+        recipe = self.recipes[0]
+        response = self.get_client(recipe.author).put(
+            reverse('recipes-detail', args=[recipe.id]),
+            data={
+                'name': recipe.name,
+                'text': recipe.text,
+                'cooking_time': recipe.cooking_time,
+                'image': fixtures.make_image(),
+                'tags': [tag.id for tag in self.tags],
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 100}
+                    for ingredient in self.ingredients[:3]
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertShoppingListActual(self.user)
+        self.get_client(self.user).delete(
+            reverse('add_recipe_to_shopping_cart', args=[recipe.id])
+        )
+        self.assertShoppingListActual(self.user)
+
+    def test_download_shopping_cart(self):
+        url = reverse('dowload_shopping_cart')
+        for file_format in ('txt', 'csv', 'pdf'):
+            with self.subTest(format=file_format):
+                response = self.assertMaxQueries(
+                    2, 'get', f'{url}?format={file_format}', self.user
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_download_shopping_cart_has_no_n_plus_one(self):
+        self.assertConstantQueries(
+            reverse('dowload_shopping_cart'),
+            lambda: fixtures.add_to_lists(self.admin, self.recipes),
+            self.admin
+        )
+
+
+class ReferenceQueryBudgetTest(QueryBudgetTestCase):
+
+    def test_tags(self):
+        self.assertMaxQueries(1, 'get', reverse('tags-list'))
+        self.assertMaxQueries(
+            1, 'get', reverse('tags-detail', args=[self.tags[0].id])
+        )
+
+    def test_ingredients(self):
+        url = reverse('ingredients-list')
+        self.assertMaxQueries(1, 'get', url)
+        self.assertMaxQueries(1, 'get', f'{url}?search=ингредиент')
+        self.assertMaxQueries(1, 'get', f'{url}?name=ингр')
+        self.assertMaxQueries(
+            1, 'get', reverse('ingredients-detail',
+                              args=[self.ingredients[0].id])
+        )
+
+
+class SubscriptionsQueryBudgetTest(QueryBudgetTestCase):
+
+    def test_subscriptions(self):
+        url = f'{reverse("users_subs")}?recipes_limit=3'
+        response = self.assertMaxQueries(5, 'get', url, self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_subscriptions_has_no_n_plus_one(self):
+        fixtures.follow(self.admin, self.authors[:1])
+        self.assertConstantQueries(
+            f'{reverse("users_subs")}?recipes_limit=3',
+            lambda: fixtures.follow(self.admin, self.authors[1:6]),
+            self.admin
+        )
+
+    def test_subscribe(self):
+        author = self.authors[-1]
+        url = reverse('subscribe', args=[author.id])
+        response = self.assertMaxQueries(7, 'get', url, self.user)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=author).exists()
+        )
+        response = self.assertMaxQueries(7, 'delete', url, self.user)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.get_client(self.user).get(
+            reverse('subscribe', args=[self.user.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class UsersQueryBudgetTest(QueryBudgetTestCase):
+
+    def test_users_list(self):
+        url = reverse('customuser-list')
+        for user, budget in ((self.user, 4), (self.admin, 4)):
+            with self.subTest(user=user):
+                response = self.assertMaxQueries(budget, 'get', url, user)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_users_list_has_no_n_plus_one(self):
+        self.assertConstantQueries(
+            reverse('customuser-list'),
+            lambda: Follow.objects.create(
+                user=self.admin, author=self.authors[0]
+            ),
+            self.admin
+        )
+
+    def test_user_detail_and_me(self):
+        self.assertMaxQueries(
+            3, 'get', reverse('customuser-detail', args=[self.authors[0].id]),
+            self.user
+        )
+        self.assertMaxQueries(3, 'get', reverse('customuser-me'), self.user)
+
+    def test_user_create(self):
+        response = self.assertMaxQueries(
+            5, 'post', reverse('customuser-list'),
+            data={
+                'email': 'new@foodgram.ru',
+                'username': 'new',
+                'first_name': 'Имя',
+                'last_name': 'Фамилия',
+                'password': 'Pa$$w0rd-foodgram',
+            }
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_token_login_logout(self):
+        response = self.assertMaxQueries(
+            6, 'post', reverse('login'),
+            data={'email': self.user.email, 'password': 'Pa$$w0rd-foodgram'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertMaxQueries(3, 'post', reverse('logout'), self.user)
+
+
+class AdminQueryBudgetTest(QueryBudgetTestCase):
+
+    def test_recipe_changelist(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get('/admin/recipes/recipe/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        fixtures.create_recipes(
+            self.authors, self.tags, self.ingredients, 20
+        )
+        with CaptureQueriesContext(connection) as after:
+            self.client.get('/admin/recipes/recipe/')
+        self.assertEqual(len(before), len(after))
+        self.assertGreater(Recipe.objects.count(), self.recipes_count)
@@ -0,0 +1,119 @@
+import numpy as np
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import IngredientInRecipe, Recipe, SimilarRecipe
+from recipes.similarity import (build_features, compute_similar_recipes,
+                                load_pairs, top_neighbours)
+from recipes.tests import fixtures
+
+
+class SimilarityTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = fixtures.create_tags()
+        cls.ingredients = fixtures.create_ingredients(6)
+        cls.recipes = fixtures.create_recipes(
+            [fixtures.create_user(1)], cls.tags, cls.ingredients, 4,
+            ingredients_per_recipe=0
+        )
+        Recipe.tags.through.objects.all().delete()
+        first, second, third, cls.empty = cls.recipes
+        for recipe, indexes in (
+            (first, (0, 1, 2)), (second, (0, 1, 3)), (third, (4, 5)),
+        ):
+            IngredientInRecipe.objects.bulk_create(
+                IngredientInRecipe(
+                    recipe=recipe, ingredient=cls.ingredients[index],
+                    amount=1
+                )
+                for index in indexes
+            )
+        third.tags.set(cls.tags[:1])
+
+    def setUp(self):
+        cache.clear()
+
+    def get_similar(self, recipe):
+        return list(
+            SimilarRecipe.objects.filter(recipe=recipe).values_list(
+                'similar_id', flat=True
+            )
+        )
+
+    def test_load_pairs_drops_unknown_recipes(self):
+        first, second = self.recipes[:2]
+        pairs = load_pairs(
+            IngredientInRecipe.objects.values_list(
+                'recipe_id', 'ingredient_id'
+            ),
+            np.array([first.id], dtype=np.int64)
+        )
+        self.assertEqual(pairs.shape, (3, 2))
+        self.assertEqual(set(pairs[:, 0]), {first.id})
+        empty = load_pairs(
+            IngredientInRecipe.objects.none().values_list(
+                'recipe_id', 'ingredient_id'
+            ),
+            np.array([first.id, second.id], dtype=np.int64)
+        )
+        self.assertEqual(empty.shape, (0, 2))
+
+    def test_features_are_normalized(self):
+        recipe_ids = np.array([recipe.id for recipe in self.recipes])
+        features = build_features(recipe_ids)
+        norms = np.sqrt(np.asarray(features.multiply(features).sum(axis=1)))
+        np.testing.assert_allclose(norms.ravel(), [1, 1, 1, 0], rtol=1e-6)
+        columns, scores = top_neighbours(features, 0, len(recipe_ids), 2)
+        self.assertEqual(recipe_ids[columns[0][0]], self.recipes[1].id)
+        self.assertAlmostEqual(float(scores[0][0]), 2 / 3, places=5)
+        self.assertEqual(float(scores[3].max()), 0)
+
+    def test_recipe_without_pairs_has_no_neighbours(self):
+        self.assertEqual(compute_similar_recipes(top=5), 2)
+        first, second, third = self.recipes[:3]
+        self.assertEqual(self.get_similar(first), [second.id])
+        self.assertEqual(self.get_similar(second), [first.id])
+        self.assertEqual(self.get_similar(third), [])
+        self.assertEqual(self.get_similar(self.empty), [])
+        response = self.client.get(
+            reverse('recipes-similar', args=[self.empty.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [])
+
+    def test_single_recipe(self):
+        Recipe.objects.exclude(pk=self.recipes[0].pk).delete()
+        self.assertEqual(compute_similar_recipes(top=5), 0)
+        self.assertFalse(SimilarRecipe.objects.exists())
+
+    def test_stale_pairs_are_replaced(self):
+        first, second, third = self.recipes[:3]
+        compute_similar_recipes(top=5)
+        IngredientInRecipe.objects.filter(recipe=second).delete()
+        IngredientInRecipe.objects.create(
+            recipe=third, ingredient=self.ingredients[0], amount=1
+        )
+        compute_similar_recipes(top=5)
+        self.assertEqual(self.get_similar(first), [third.id])
+        self.assertEqual(self.get_similar(second), [])
+        response = self.client.get(
+            reverse('recipes-similar', args=[first.id])
+        )
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()], [third.id]
+        )
+
+    def test_deleted_neighbour_is_not_returned(self):
+        first, second = self.recipes[:2]
+        compute_similar_recipes(top=5)
+        second.delete()
+        self.assertEqual(self.get_similar(first), [])
+        response = self.client.get(
+            reverse('recipes-similar', args=[first.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [])
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import Favorite, PurchaseList, RecipeScore, TrendingRun
+from recipes.tests import fixtures
+from recipes.trending import (HALF_LIFE, OVERLAP, RUNS_RETENTION,
+                              compute_trending, decay)
+
+
+class TrendingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [fixtures.create_user(index) for index in range(3)]
+        cls.recipes = fixtures.create_recipes(
+            cls.users[:1], fixtures.create_tags(),
+            fixtures.create_ingredients(2), 4, ingredients_per_recipe=2
+        )
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def add(self, model, user, recipe, age):
+        entry = model.objects.create(user=user, recipe=recipe)
+        model.objects.filter(pk=entry.pk).update(
+            date_added=self.now - age
+        )
+        return entry
+
+    def get_scores(self):
+        return dict(RecipeScore.objects.values_list('recipe_id', 'score'))
+
+    def assertScores(self, expected):
+        scores = self.get_scores()
+        self.assertEqual(set(scores), set(expected))
+        for recipe_id, score in expected.items():
+            self.assertAlmostEqual(scores[recipe_id], score)
+
+    def test_decay(self):
+        self.assertEqual(decay(timedelta()), 1)
+        self.assertAlmostEqual(decay(HALF_LIFE), 0.5)
+        self.assertAlmostEqual(decay(HALF_LIFE * 3), 0.125)
+        self.assertAlmostEqual(decay(HALF_LIFE / 2), 0.5 ** 0.5)
+
+    def test_rebuild(self):
+        first, second, third = self.recipes[:3]
+        self.add(Favorite, self.users[0], first, HALF_LIFE)
+        self.add(PurchaseList, self.users[0], first, timedelta())
+        self.add(Favorite, self.users[1], second, HALF_LIFE * 2)
+        self.add(Favorite, self.users[2], third, HALF_LIFE * 10)
+        self.assertEqual(compute_trending(rebuild=True, now=self.now), 3)
+        self.assertScores({first.id: 2.5, second.id: 0.25})
+        self.assertEqual(TrendingRun.objects.get().watermark, self.now)
+
+    def test_incremental_run_decays_and_adds(self):
+        first, second = self.recipes[:2]
+        self.add(Favorite, self.users[0], first, timedelta())
+        compute_trending(now=self.now)
+        self.now += HALF_LIFE
+        self.add(PurchaseList, self.users[1], second, timedelta())
+        compute_trending(now=self.now)
+        self.assertScores({first.id: 0.5, second.id: 2.0})
+
+    def test_late_commit_inside_overlap(self):
+        first, second = self.recipes[:2]
+        self.add(Favorite, self.users[0], first, timedelta())
+        compute_trending(now=self.now)
+        self.add(Favorite, self.users[0], second, OVERLAP / 2)
+        self.add(Favorite, self.users[1], first, OVERLAP / 2)
+        self.now += timedelta(hours=1)
+        compute_trending(now=self.now)
+        self.assertScores({
+            first.id: (
+                decay(timedelta(hours=1))
+                + decay(timedelta(hours=1) + OVERLAP / 2)
+            ),
+            second.id: decay(timedelta(hours=1) + OVERLAP / 2),
+        })
+
+    def test_removed_entries_are_subtracted(self):
+        first, second = self.recipes[:2]
+        favorite = self.add(Favorite, self.users[0], first, timedelta())
+        self.add(Favorite, self.users[1], first, timedelta())
+        cart = self.add(PurchaseList, self.users[0], second, timedelta())
+        compute_trending(now=self.now)
+        favorite.delete()
+        cart.delete()
+        self.now += timedelta(hours=1)
+        self.assertEqual(compute_trending(now=self.now), 2)
+        self.assertScores({first.id: decay(timedelta(hours=1))})
+
+    def test_incremental_matches_rebuild(self):
+        self.add(Favorite, self.users[0], self.recipes[0], HALF_LIFE)
+        compute_trending(now=self.now)
+        self.add(PurchaseList, self.users[1], self.recipes[1], timedelta())
+        self.add(Favorite, self.users[2], self.recipes[0], timedelta())
+        Favorite.objects.filter(user=self.users[0]).delete()
+        self.now += timedelta(days=1)
+        compute_trending(now=self.now)
+        incremental = self.get_scores()
+        compute_trending(rebuild=True, now=self.now)
+        self.assertEqual(set(incremental), set(self.get_scores()))
+        for recipe_id, score in self.get_scores().items():
+            self.assertAlmostEqual(incremental[recipe_id], score)
+
+    def test_old_runs_are_pruned(self):
+        TrendingRun.objects.create(
+            watermark=self.now - RUNS_RETENTION * 2, recipes_updated=0
+        )
+        recent = TrendingRun.objects.create(
+            watermark=self.now - timedelta(days=1), recipes_updated=0
+        )
+        compute_trending(now=self.now)
+        self.assertEqual(
+            list(TrendingRun.objects.values_list('watermark', flat=True)),
+            [self.now, recent.watermark]
+        )
@@ -0,0 +1,26 @@
+from django.db import IntegrityError, transaction
+
+from .counters import recount_counters
+
+
+def add_entry(model, **fields):
+    try:
+        with transaction.atomic():
+            model.objects.create(**fields)
+    except IntegrityError:
+        return False
+    return True
+
+
+def remove_entries(model, user, field, values):
+    with transaction.atomic():
+        deleted, _ = model.objects.filter(
+            user=user, **{f'{field}__in': values}
+        ).delete()
+        if deleted:
+            recount_counters(model, values)
+    return deleted
+
+
+def remove_entry(model, user, field, value):
+    return remove_entries(model, user, field, [value]) > 0
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Favorite, PurchaseList, RecipeScore, TrendingRun
+from .response_cache import bump_version
+
+HALF_LIFE = timedelta(days=3)
+OVERLAP = timedelta(minutes=10)
+RUNS_RETENTION = timedelta(days=7)
+WEIGHTS = (
+    (Favorite, 'favorites_count', 1.0),
+    (PurchaseList, 'in_carts_count', 2.0),
+)
+MIN_SCORE = 0.01
+BATCH_SIZE = 1000
+
+
+def decay(age):
+    return 0.5 ** (age / HALF_LIFE)
+
+
+def in_batches(recipe_ids):
+    recipe_ids = sorted(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        yield recipe_ids[start:start + BATCH_SIZE]
+
+
+def collect_scores(recipe_ids, now):
+    scores = {}
+    for model, counter, weight in WEIGHTS:
+        events = model.objects.filter(date_added__lte=now)
+        if recipe_ids is not None:
+            events = events.filter(recipe_id__in=recipe_ids)
+        rows = events.values_list('recipe_id', 'date_added')
+        for recipe_id, date_added in rows.iterator():
+            score = scores.get(recipe_id)
+            if score is None:
+                score = scores[recipe_id] = RecipeScore(
+                    recipe_id=recipe_id, score=0
+                )
+            score.score += weight * decay(now - date_added)
+            setattr(score, counter, getattr(score, counter) + 1)
+    return scores
+
+
+def get_affected(since):
+    affected = set(
+        RecipeScore.objects.exclude(**{
+            counter: F(f'recipe__{counter}')
+            for _, counter, _ in WEIGHTS
+        }).values_list('recipe_id', flat=True)
+    )
+    for model, _, _ in WEIGHTS:
+        affected.update(
+            model.objects.filter(date_added__gt=since).values_list(
+                'recipe_id', flat=True
+            )
+        )
+    return affected
+
+
+def compute_trending(rebuild=False, now=None):
+    now = now or timezone.now()
+    last_run = None if rebuild else TrendingRun.objects.first()
+    with transaction.atomic():
+        if last_run is None:
+            RecipeScore.objects.all().delete()
+            scores = collect_scores(None, now)
+            affected = set(scores)
+        else:
+            RecipeScore.objects.update(
+                score=F('score') * decay(now - last_run.watermark)
+            )
+            affected = get_affected(last_run.watermark - OVERLAP)
+            scores = {}
+            for recipe_ids in in_batches(affected):
+                scores.update(collect_scores(recipe_ids, now))
+            for recipe_ids in in_batches(affected - set(scores)):
+                RecipeScore.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeScore.objects.bulk_create(
+            scores.values(),
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=['score', 'favorites_count', 'in_carts_count'],
+            batch_size=BATCH_SIZE
+        )
+        RecipeScore.objects.filter(score__lt=MIN_SCORE).delete()
+        TrendingRun.objects.create(
+            watermark=now, recipes_updated=len(affected)
+        )
+        TrendingRun.objects.filter(
+            watermark__lt=now - RUNS_RETENTION
+        ).delete()
+        transaction.on_commit(bump_version)
+    return len(affected)
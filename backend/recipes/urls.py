@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (DownloadShoppingCart, FavouriteViewSet, FollowViewSet,
-                    IngredientViewSet, PurchaseListViewSet, RecipesViewSet,
-                    TagViewSet, showfollows)
+from .async_views import FavouriteViewSet, FollowViewSet, PurchaseListViewSet
+from .views import (BulkFavouriteView, BulkPurchaseListView,
+                    DownloadShoppingCart, IngredientViewSet, RecipesViewSet,
+                    ShoppingListView, TagViewSet, showfollows)
 
 router = DefaultRouter()
 router.register('tags', TagViewSet, basename='tags')
@@ -11,6 +12,14 @@ router.register('recipes', RecipesViewSet, basename='recipes')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 
 urlpatterns = [
+     path('recipes/download_shopping_cart/',
+          DownloadShoppingCart.as_view(), name='dowload_shopping_cart'),
+     path('recipes/favorite/',
+          BulkFavouriteView.as_view(), name='bulk_favorite'),
+     path('recipes/shopping_cart/',
+          BulkPurchaseListView.as_view(), name='bulk_shopping_cart'),
+     path('recipes/shopping_cart/ingredients/',
+          ShoppingListView.as_view(), name='shopping_list'),
      path('', include(router.urls)),
      path('users/subscriptions/', showfollows, name='users_subs'),
      path('users/<int:user_id>/subscribe/',
@@ -18,7 +27,5 @@ urlpatterns = [
      path('recipes/<int:recipe_id>/favorite/',
           FavouriteViewSet.as_view(), name='add_recipe_to_favorite'),
      path('recipes/<int:recipe_id>/shopping_cart/',
-          PurchaseListViewSet.as_view(), name='add_recipe_to_shopping_cart'),
-     path('recipes/download_shopping_cart/',
-          DownloadShoppingCart.as_view(), name='dowload_shopping_cart')
+          PurchaseListViewSet.as_view(), name='add_recipe_to_shopping_cart')
 ]
@@ -0,0 +1,27 @@
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        return cache.get(key)
+    return version
+
+
+def get_modified(key):
+    modified_key = f'{key}:modified'
+    modified = cache.get(modified_key)
+    if modified is None:
+        cache.add(modified_key, int(time.time()), None)
+        return cache.get(modified_key)
+    return modified
+
+
+def bump_version(key):
+    cache.set_many(
+        {key: uuid.uuid4().hex, f'{key}:modified': int(time.time())}, None
+    )
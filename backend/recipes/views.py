@@ -1,48 +1,174 @@
 import django_filters.rest_framework
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import filters, status, viewsets
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .counters import recount_counters
 from .filters import RecipeFilter
+from .ingredient_index import ingredient_index
+from .mixins import AnonymousCacheMixin, CachedListMixin
 from .models import (CustomUser, Favorite, Follow, Ingredient,
-                     IngredientInRecipe, PurchaseList, Recipe, Tag)
+                     IngredientInRecipe, PurchaseList, Recipe, SimilarRecipe,
+                     Tag)
+from .pagination import FeedPagination, LimitPagination, RecipePagination
 from .permissions import AdminOrAuthorOrReadOnly
-from .serializers import (AddFavouriteRecipeSerializer, CreateRecipeSerializer,
-                          IngredientSerializer, ListRecipeSerializer,
-                          ShowFollowersSerializer, TagSerializer,
-                          UserSerializer)
+from .recipe_index import MODE_ANY, MODES, recipe_index
+from .serializers import (CreateRecipeSerializer, IngredientSerializer,
+                          ListRecipeSerializer, PantryRecipeSerializer,
+                          RecipeIdsSerializer, ShoppingListItemSerializer,
+                          ShowFollowersSerializer, TagSerializer)
+from .shopping_list import (FORMATS, get_shopping_list, recipe_ingredients,
+                            refresh_shopping_lists, stream)
+from .signals import INGREDIENTS_CACHE_KEY, TAGS_CACHE_KEY
+from .toggles import remove_entries
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
+    cache_key = TAGS_CACHE_KEY
     pagination_class = None
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
-    filter_class = RecipeFilter
+    filterset_class = RecipeFilter
+    pagination_class = RecipePagination
     permission_classes = [AdminOrAuthorOrReadOnly, ]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ['list', 'retrieve', 'pantry', 'feed',
+                               'similar']:
+            return queryset
+        user = self.request.user
+        queryset = queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientinrecipe_set',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False)
+            )
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                PurchaseList.objects.filter(user=user, recipe=OuterRef('pk'))
+            )
+        )
+
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'feed', 'similar']:
             return ListRecipeSerializer
+        if self.action == 'pantry':
+            return PantryRecipeSerializer
         return CreateRecipeSerializer
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({'request': self.request})
+        if self.action in ['list', 'pantry', 'feed', 'similar']:
+            context.update({'image_variant': 'thumbnail'})
         return context
 
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            Exists(
+                Follow.objects.filter(
+                    user=request.user, author=OuterRef('author')
+                )
+            )
+        )
+        paginator = FeedPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def get_pantry_params(self):
+        params = self.request.query_params
+        errors = {}
+        ingredient_ids = [
+            value for value in params.getlist('ingredients') if value
+        ]
+        if not ingredient_ids:
+            errors['ingredients'] = 'Укажите хотя бы один ингредиент'
+        elif not all(value.isdigit() for value in ingredient_ids):
+            errors['ingredients'] = 'Должны быть целыми числами'
+        mode = params.get('mode', MODE_ANY)
+        if mode not in MODES:
+            errors['mode'] = f'Допустимые значения: {", ".join(MODES)}'
+        missing = params.get('missing')
+        if missing is not None and not missing.isdigit():
+            errors['missing'] = 'Должно быть неотрицательным целым числом'
+        if errors:
+            raise ValidationError(errors)
+        return (
+            [int(value) for value in ingredient_ids],
+            mode,
+            None if missing is None else int(missing)
+        )
+
+    @action(detail=False, permission_classes=[AllowAny])
+    def pantry(self, request):
+        ingredient_ids, mode, missing = self.get_pantry_params()
+        matches = recipe_index.match(ingredient_ids, mode, missing)
+        paginator = LimitPagination()
+        page = paginator.paginate_queryset(matches, request, view=self)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        result = []
+        for recipe_id, matched, lacking in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched_ingredients = matched
+            recipe.missing_ingredients = lacking
+            result.append(recipe)
+        serializer = self.get_serializer(result, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, permission_classes=[AllowAny])
+    def similar(self, request, pk=None):
+        if not pk.isdigit():
+            raise Http404
+        similar_ids = list(
+            SimilarRecipe.objects.filter(recipe_id=pk).values_list(
+                'similar_id', flat=True
+            )
+        )
+        if not similar_ids and not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        recipes = self.get_queryset().in_bulk(similar_ids)
+        serializer = self.get_serializer(
+            [
+                recipes[recipe_id]
+                for recipe_id in similar_ids if recipe_id in recipes
+            ],
+            many=True
+        )
+        return Response(serializer.data)
+
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
+    cache_key = INGREDIENTS_CACHE_KEY
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny, )
@@ -50,149 +176,154 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', ]
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
+
 
 @api_view(['GET', ])
 @permission_classes([IsAuthenticated])
 def showfollows(request):
-    user_obj = CustomUser.objects.filter(following__user=request.user)
-    paginator = PageNumberPagination()
-    paginator.page_size = 10
+    recipes_limit = request.query_params.get('recipes_limit')
+    recipes = Recipe.objects.all()
+    if recipes_limit is not None:
+        if not recipes_limit.isdigit():
+            raise ValidationError(
+                {'recipes_limit': 'Должно быть неотрицательным целым числом'}
+            )
+        recipes = recipes[:int(recipes_limit)]
+    user_obj = CustomUser.objects.filter(
+        following__user=request.user
+    ).order_by('id').prefetch_related(
+        Prefetch('recipes', queryset=recipes, to_attr='latest_recipes')
+    )
+    paginator = LimitPagination()
     result_page = paginator.paginate_queryset(user_obj, request)
     serializer = ShowFollowersSerializer(
-        result_page, many=True, context={'current_user': request.user})
+        result_page, many=True,
+        context={'request': request})
     return paginator.get_paginated_response(serializer.data)
 
 
-class FollowViewSet(APIView):
+class BulkRecipeListView(APIView):
     permission_classes = (IsAuthenticated, )
+    model = None
 
-    def get(self, request, user_id):
-        user = request.user
-        author = get_object_or_404(CustomUser, id=user_id)
-        if Follow.objects.filter(user=user, author=author).exists():
-            return Response(
-                'Вы уже подписаны',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        Follow.objects.create(user=user, author=author)
-        serializer = UserSerializer(author)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['recipes']))
 
-    def delete(self, request, user_id):
+    def entries_changed(self, user, recipe_ids):
+        pass
+
+    def post(self, request):
         user = request.user
-        author = get_object_or_404(CustomUser, id=user_id)
-        try:
-            follow = get_object_or_404(user=user, author=author)
-            follow.delete()
-            return Response(
-                'Удалено',
-                status=status.HTTP_204_NO_CONTENT
+        recipe_ids = self.get_recipe_ids(request)
+        with transaction.atomic():
+            listed = dict(
+                Recipe.objects.filter(id__in=recipe_ids).annotate(
+                    listed=Exists(
+                        self.model.objects.filter(
+                            user=user, recipe=OuterRef('pk')
+                        )
+                    )
+                ).values_list('id', 'listed')
             )
-        except Exception:
-            return Response(
-                'Подписки не было',
-                status=status.HTTP_400_BAD_REQUEST
+            entries = self.model.objects.bulk_create(
+                [
+                    self.model(user=user, recipe_id=recipe_id)
+                    for recipe_id in recipe_ids
+                    if listed.get(recipe_id) is False
+                ],
+                ignore_conflicts=True
             )
+            stamps = {entry.recipe_id: entry.date_added for entry in entries}
+            added = [
+                recipe_id
+                for recipe_id, date_added in self.model.objects.filter(
+                    user=user, recipe_id__in=stamps
+                ).values_list('recipe_id', 'date_added')
+                if stamps[recipe_id] == date_added
+            ]
+            recount_counters(self.model, added)
+            self.entries_changed(user, added)
+        results = []
+        for recipe_id in recipe_ids:
+            if recipe_id not in listed:
+                result = 'not_found'
+            elif recipe_id in added:
+                result = 'added'
+            else:
+                result = 'exists'
+            results.append({'id': recipe_id, 'status': result})
+        return Response({'results': results})
 
-
-class FavouriteViewSet(APIView):
-    permission_classes = (IsAuthenticated, )
-
-    def get(self, request, recipe_id):
+    def delete(self, request):
         user = request.user
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        if Favorite.objects.filter(user=user, recipe=recipe).exists():
-            return Response(
-                'Вы уже добавили рецепт в избранное',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        Favorite.objects.create(user=user, recipe=recipe)
-        serializer = AddFavouriteRecipeSerializer(recipe)
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED
+        recipe_ids = self.get_recipe_ids(request)
+        entries = self.model.objects.filter(
+            user=user, recipe_id__in=recipe_ids
         )
+        removed = set(entries.values_list('recipe_id', flat=True))
+        if removed:
+            remove_entries(self.model, user, 'recipe', list(removed))
+        results = [
+            {
+                'id': recipe_id,
+                'status': 'removed' if recipe_id in removed else 'not_found'
+            }
+            for recipe_id in recipe_ids
+        ]
+        return Response({'results': results})
 
-    def delete(self, request, recipe_id):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        favorite_obj = get_object_or_404(Favorite, user=user, recipe=recipe)
-        if not favorite_obj:
-            return Response(
-                'Рецепт не был в избранном',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        favorite_obj.delete()
-        return Response(
-            'Удалено',
-            status=status.HTTP_204_NO_CONTENT
-        )
 
+class BulkFavouriteView(BulkRecipeListView):
+    model = Favorite
 
-class PurchaseListViewSet(APIView):
-    permission_classes = (IsAuthenticated, )
 
-    def get(self, request, recipe_id):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        if PurchaseList.objects.filter(user=user, recipe=recipe).exists():
-            return Response(
-                'Вы уже добавили рецепт в список покупок',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        PurchaseList.objects.create(user=user, recipe=recipe)
-        serializer = AddFavouriteRecipeSerializer(recipe)
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED
-        )
+class BulkPurchaseListView(BulkRecipeListView):
+    model = PurchaseList
 
-    def delete(self, request, recipe_id):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        shopping_list_obj = get_object_or_404(
-            PurchaseList, user=user, recipe=recipe)
-        if not shopping_list_obj:
-            return Response(
-                'Рецепт не был в списке покупок',
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        shopping_list_obj.delete()
-        return Response(
-            'Удалено',
-            status=status.HTTP_204_NO_CONTENT
+    def entries_changed(self, user, recipe_ids):
+        if recipe_ids:
+            refresh_shopping_lists(
+                [user.id], recipe_ingredients(list(recipe_ids))
             )
 
 
+class ShoppingListView(APIView):
+    permission_classes = (IsAuthenticated, )
+
+    def get(self, request):
+        items = request.user.shopping_list_items.select_related(
+            'ingredient'
+        ).order_by('ingredient__name')
+        serializer = ShoppingListItemSerializer(items, many=True)
+        return Response(serializer.data)
+
+
 class DownloadShoppingCart(APIView):
     permission_classes = (IsAuthenticated, )
 
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request):
-        user = request.user
-        shopping_cart = user.purchases.all()
-        buying_list = {}
-        for record in shopping_cart:
-            recipe = record.recipe
-            ingredients = IngredientInRecipe.objects.filter(recipe=recipe)
-            for ingredient in ingredients:
-                amount = ingredient.amount
-                name = ingredient.ingredient.name
-                measurement_unit = ingredient.ingredient.measurement_unit
-                if name not in buying_list:
-                    buying_list[name] = {
-                        'measurement_unit': measurement_unit,
-                        'amount': amount
-                    }
-                else:
-                    buying_list[name]['amount'] = (buying_list[name]['amount']
-                                                   + amount)
-
-        wishlist = []
-        for item in buying_list:
-            wishlist.append(f'{item} - {buying_list[item]["amount"]} '
-                            f'{buying_list[item]["measurement_unit"]} \n')
-        wishlist.append('\n')
-        wishlist.append('FoodGram, 2021')
-        response = HttpResponse(wishlist, 'Content-Type: text/plain')
-        response['Content-Disposition'] = 'attachment; filename="wishlist.txt"'
+        file_format = request.query_params.get('format', 'txt')
+        if file_format not in FORMATS:
+            return Response(
+                'Неизвестный формат файла',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        render, content_type, filename = FORMATS[file_format]
+        shopping_list = get_shopping_list(request.user)
+        response = StreamingHttpResponse(
+            stream(render(shopping_list)), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
         return response
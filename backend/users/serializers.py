@@ -1,7 +1,7 @@
 from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 
-from recipes.models import Follow
+from recipes.subscriptions import get_subscribed_ids
 
 from .models import CustomUser
 
@@ -24,8 +24,4 @@ class UserSerializer(serializers.ModelSerializer):
                   'first_name', 'last_name', 'is_subscribed')
 
     def check_if_is_subscribed(self, user):
-        current_user = self.context['request'].user
-        other_user = user.following.all()
-        if other_user.count() == 0:
-            return False
-        return Follow.objects.filter(user=user, author=current_user).exists()
+        return user.id in get_subscribed_ids(self.context.get('request'))